@@ -0,0 +1,5 @@
+from dotenv import load_dotenv
+
+# Before any module of the package reads its settings at import time
+# (database, metrics, writer, ...); variables already set in the environment win
+load_dotenv()
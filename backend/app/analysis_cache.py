@@ -0,0 +1,146 @@
+from collections import OrderedDict
+import hashlib
+import json
+import os
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .coins import identify_coins_in_text
+from .database import IN_CHUNK_SIZE
+from .models import AnalysisResult
+from .pipeline import analyze_articles
+from . import lexicon, metrics, sentiment_analysis
+
+COMPONENTS = ("coins", "sentiment")
+# Entries kept in memory on top of the analysis_cache table
+LRU_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "4096"))
+
+
+def content_hash(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class AnalysisCache:
+    '''
+    analyze_articles with results remembered by content hash.
+
+    Lookups go to an in-process LRU first, then to the analysis_cache table.
+    Only texts missing from both are matched, and only for the components
+    that are missing (a full miss goes through analyze_articles, pool and all).
+    '''
+
+    def __init__(self, size=LRU_SIZE):
+        self.size = size
+        self._lru = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self._lru.clear()
+
+    def _remember(self, key, value):
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        if len(self._lru) > self.size:
+            self._lru.popitem(last=False)
+
+    def analyze(self, texts, db):
+        '''
+            Analyses of `texts`, in order; new results are stored in the
+            caller's transaction
+        '''
+        analyses, computed = self.lookup(texts, db)
+        if computed:
+            self.store(db, computed)
+        return analyses
+
+    @metrics.timed("analyze")
+    def lookup(self, texts, db):
+        '''
+            (analyses, computed): like analyze but read-only, `computed` holds
+            what was matched now, for store() (the writer thread in WAL mode)
+        '''
+        texts = list(texts)
+        lex = lexicon.current()
+        versions = lex.versions
+        hashes = [content_hash(text) for text in texts]
+
+        # (hash, component, version) -> result
+        found = {}
+        for h in set(hashes):
+            for component in COMPONENTS:
+                key = (h, component, versions[component])
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+                    found[key] = self._lru[key]
+
+        missing = list({h for h in hashes for c in COMPONENTS if (h, c, versions[c]) not in found})
+        for i in range(0, len(missing), IN_CHUNK_SIZE):
+            rows = db.query(AnalysisResult).filter(
+                AnalysisResult.content_hash.in_(missing[i:i + IN_CHUNK_SIZE])
+            )
+            for row in rows:
+                if row.version == versions[row.component]:
+                    key = (row.content_hash, row.component, row.version)
+                    found[key] = json.loads(row.result)
+                    self._remember(key, found[key])
+
+        # Match what is still missing, once per distinct text
+        full, coins_only, sentiment_only = {}, {}, {}
+        for h, text in zip(hashes, texts):
+            has_coins = (h, "coins", versions["coins"]) in found
+            has_sentiment = (h, "sentiment", versions["sentiment"]) in found
+            if not has_coins and not has_sentiment:
+                full[h] = text
+            elif not has_coins:
+                coins_only[h] = text
+            elif not has_sentiment:
+                sentiment_only[h] = text
+
+        computed = {}
+        analyses = analyze_articles(list(full.values()), lex) if full else []
+        for h, analysis in zip(full, analyses):
+            computed[(h, "coins", versions["coins"])] = analysis["coins"]
+            computed[(h, "sentiment", versions["sentiment"])] = analysis["sentiment"]
+        for h, text in coins_only.items():
+            computed[(h, "coins", versions["coins"])] = identify_coins_in_text(text, lex=lex)
+        for h, text in sentiment_only.items():
+            computed[(h, "sentiment", versions["sentiment"])] = sentiment_analysis.analyze_sentiment(text, lex)
+
+        found.update(computed)
+
+        misses = len(full) + len(coins_only) + len(sentiment_only)
+        self.hits += len(texts) - misses
+        self.misses += misses
+        if metrics.ENABLED:
+            metrics.analysis_cache.labels("hit").inc(len(texts) - misses)
+            metrics.analysis_cache.labels("miss").inc(misses)
+        analyses = [
+            {
+                "coins": found[(h, "coins", versions["coins"])],
+                "sentiment": found[(h, "sentiment", versions["sentiment"])],
+            }
+            for h in hashes
+        ]
+        return analyses, computed
+
+    def store(self, db, computed):
+        '''
+            Upsert into analysis_cache (a stale version gets overwritten), in
+            the caller's transaction
+        '''
+        rows = [
+            {"content_hash": h, "component": component, "version": version, "result": json.dumps(result)}
+            for (h, component, version), result in computed.items()
+        ]
+        statement = sqlite_insert(AnalysisResult.__table__)
+        statement = statement.on_conflict_do_update(
+            index_elements=["content_hash", "component"],
+            set_={"version": statement.excluded.version, "result": statement.excluded.result},
+        )
+        db.execute(statement, rows)
+        for key, result in computed.items():
+            self._remember(key, result)
+
+
+analysis_cache = AnalysisCache()
@@ -0,0 +1,8 @@
+import os
+
+# Compiled matcher files, shared by every worker started from this directory
+ARTIFACT_DIR = os.getenv("MATCHER_ARTIFACT_DIR", "./artifacts")
+
+
+def artifact_path(name):
+    return os.path.join(ARTIFACT_DIR, f"{name}.acdfa")
@@ -0,0 +1,244 @@
+import numpy as np
+
+from . import lexicon
+from .stringmatching.document import Document
+
+# Documents scanned in lockstep per chunk (bounds the state/index arrays)
+CHUNK_SIZE = 8192
+GROUPS = ("positive", "negative")
+LABELS = {0: "neutral", 1: "positive", -1: "negative"}
+
+
+def csr(lists):
+    '''
+        (ptr, values) of a list of int lists
+    '''
+    ptr = np.zeros(len(lists) + 1, dtype=np.int64)
+    ptr[1:] = np.cumsum([len(values) for values in lists])
+    return ptr, np.array([v for values in lists for v in values], dtype=np.int64)
+
+
+def expand(keys, ptr, values):
+    '''
+        Every key paired with each of its CSR values: (positions, values),
+        where positions index into `keys`
+    '''
+    first = ptr[keys]
+    counts = ptr[keys + 1] - first
+    within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(np.arange(len(keys)), counts), values[np.repeat(first, counts) + within]
+
+
+class HitMatrix:
+    '''
+    Sparse document x keyword matrix in coordinate form: keyword `cols[i]`
+    (an index into `keywords`, a list of (group, keyword)) occurs in
+    document `docs[i]`. Pairs are unique and sorted by document.
+    '''
+
+    def __init__(self, docs, cols, keywords, n_docs):
+        self.docs = docs
+        self.cols = cols
+        self.keywords = keywords
+        self.shape = (n_docs, len(keywords))
+
+    def to_dense(self):
+        dense = np.zeros(self.shape, dtype=bool)
+        dense[self.docs, self.cols] = True
+        return dense
+
+
+class CorpusScores:
+    '''
+        Sentiment of a whole corpus as arrays, one entry per input text
+    '''
+
+    def __init__(self, hits, is_positive):
+        self.hits = hits
+        n_docs = hits.shape[0]
+        positive = is_positive[hits.cols]
+        self.pos_count = np.bincount(hits.docs[positive], minlength=n_docs)
+        self.neg_count = np.bincount(hits.docs[~positive], minlength=n_docs)
+        total = self.pos_count + self.neg_count
+        self.score = (self.pos_count - self.neg_count) / np.maximum(1, total)
+        self.label = np.sign(self.pos_count - self.neg_count)
+
+    def __len__(self):
+        return self.hits.shape[0]
+
+    def results(self):
+        '''
+            Same dicts analyze_sentiment returns, in input order
+        '''
+        keywords = self.hits.keywords
+        found = [([], []) for _ in range(len(self))]
+        for doc, col in zip(self.hits.docs.tolist(), self.hits.cols.tolist()):
+            group, keyword = keywords[col]
+            found[doc][0 if group == "positive" else 1].append(keyword)
+
+        return [
+            {
+                "score": round(score, 2),
+                "sentiment": LABELS[label],
+                "positive": {"count": pos_count, "keywords": sorted(pos)},
+                "negative": {"count": neg_count, "keywords": sorted(neg)},
+            }
+            for score, label, pos_count, neg_count, (pos, neg) in zip(
+                self.score.tolist(), self.label.tolist(),
+                self.pos_count.tolist(), self.neg_count.tolist(), found,
+            )
+        ]
+
+
+class BatchScorer:
+    '''
+    analyze_sentiment for a whole corpus at once.
+
+    The exact pass encodes every article into one contiguous byte buffer
+    (alphabet indices, `offsets` marks where each one starts) and runs the
+    compiled DFA over all of them in lockstep: step t advances every article
+    still longer than t with one NumPy gather, so the Python loop runs once
+    per character position instead of once per character. Hits are read off
+    the accepting states into a sparse document x keyword matrix; the fuzzy
+    pass adds its hits to the same matrix, and counts / scores are column
+    sums over it.
+    '''
+
+    def __init__(self, lex=None):
+        self.lex = lex or lexicon.current()
+        matcher = self.lex.matcher
+        dfa = matcher.automaton
+        if dfa.stride > 256:
+            raise ValueError("alphabet too large for byte-encoded batch scan")
+
+        self.dfa = dfa
+        # zero-copy view of the array / memory-mapped table
+        self.delta = np.frombuffer(dfa.delta, dtype=np.int32)
+
+        # Columns: every (group, keyword) of the sentiment lexicon
+        self.keywords = [(group, kw) for group in GROUPS for kw in self.lex.keywords[group]]
+        column = {key: i for i, key in enumerate(self.keywords)}
+        self.is_positive = np.array([group == "positive" for group, _ in self.keywords], dtype=bool)
+
+        # Accepting state -> columns it reports (CSR), coin labels dropped
+        n_accept = (len(self.delta) - dfa.accept_from) // dfa.stride
+        per_state = [[] for _ in range(n_accept)]
+        for base, ids in dfa.outputs.items():
+            cols = per_state[(base - dfa.accept_from) // dfa.stride]
+            for j in ids:
+                for label in matcher.labels[dfa.words[j]]:
+                    if label in column and column[label] not in cols:
+                        cols.append(column[label])
+        self.state_ptr, self.state_cols = csr(per_state)
+
+        # fuzzy keyword -> columns (a keyword may sit in both lists)
+        self.fuzzy_cols = {}
+        for i, (_, kw) in enumerate(self.keywords):
+            self.fuzzy_cols.setdefault(kw, []).append(i)
+
+    def encode(self, docs):
+        '''
+            (buffer, offsets, lengths) of the documents as alphabet indices
+        '''
+        whole_words = self.dfa.whole_words
+        separator = bytes([self.dfa.separator])
+        chunks = []
+        for doc in docs:
+            # the text KeywordMatcher.scan would walk
+            text = doc.lower if whole_words else doc.clean
+            codes = text.translate(self.dfa.classes).encode('latin-1')
+            # whole_words: the trailing separator step of iter_matches
+            chunks.append(codes + separator if whole_words else codes)
+        lengths = np.fromiter(map(len, chunks), dtype=np.int64, count=len(chunks))
+        offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        buffer = np.frombuffer(b''.join(chunks), dtype=np.uint8)
+        return buffer, offsets, lengths
+
+    def exact_hits(self, docs):
+        '''
+            (doc, column) pairs of exact sentiment matches, one lockstep scan
+        '''
+        buffer, offsets, lengths = self.encode(docs)
+        # longest first, so the articles still running at step t are a prefix
+        order = np.argsort(-lengths, kind='stable')
+        starts = offsets[:-1][order]
+        remaining = lengths[order]
+        states = np.full(len(docs), self.dfa.start, dtype=np.int32)
+        accept_from = self.dfa.accept_from
+
+        hit_docs, hit_states = [], []
+        active = len(docs)
+        for t in range(int(remaining[0]) if len(docs) else 0):
+            while active and remaining[active - 1] <= t:
+                active -= 1
+            current = self.delta[states[:active] + buffer[starts[:active] + t]]
+            states[:active] = current
+            accepting = np.flatnonzero(current >= accept_from)
+            if accepting.size:
+                hit_docs.append(order[accepting])
+                hit_states.append(current[accepting])
+
+        if not hit_docs:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        hit_docs = np.concatenate(hit_docs)
+        accept = (np.concatenate(hit_states) - accept_from) // self.dfa.stride
+
+        # every hit -> the columns of its state
+        which, cols = expand(accept, self.state_ptr, self.state_cols)
+        return hit_docs[which], cols
+
+    def fuzzy_hits(self, docs):
+        '''
+            (doc, column) pairs of fuzzy matches: each distinct n-gram of the
+            chunk is looked up once (FuzzyIndex.lookup_many)
+        '''
+        index = self.lex.fuzzy_index
+        hit_docs, hit_cols = [], []
+        for n in list(index.buckets):
+            ngrams = [doc.ngrams(n) for doc in docs]
+            phrases = [phrase for doc_ngrams in ngrams for phrase in doc_ngrams]
+            doc_rows = np.repeat(np.arange(len(docs)), [len(doc_ngrams) for doc_ngrams in ngrams])
+            distinct = {phrase: i for i, phrase in enumerate(dict.fromkeys(phrases))}
+            phrase_rows = np.fromiter(map(distinct.__getitem__, phrases), dtype=np.int64, count=len(phrases))
+
+            found = index.lookup_many(n, list(distinct))
+            ptr, cols = csr([[c for kw in keywords for c in self.fuzzy_cols.get(kw, ())] for keywords in found])
+            which, cols = expand(phrase_rows, ptr, cols)
+            hit_docs.append(doc_rows[which])
+            hit_cols.append(cols)
+
+        if not hit_docs:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(hit_docs), np.concatenate(hit_cols)
+
+    def hit_matrix(self, docs):
+        exact_docs, exact_cols = self.exact_hits(docs)
+        fuzzy_docs, fuzzy_cols = self.fuzzy_hits(docs)
+        n_cols = max(1, len(self.keywords))
+        flat = np.unique(np.concatenate([
+            exact_docs * n_cols + exact_cols, fuzzy_docs * n_cols + fuzzy_cols,
+        ]))
+        return HitMatrix(flat // n_cols, flat % n_cols, self.keywords, len(docs))
+
+    def score(self, texts, chunk_size=CHUNK_SIZE):
+        '''
+            CorpusScores for `texts` (str or Document), in order
+        '''
+        docs = [Document.of(text) for text in texts]
+        parts = [self.hit_matrix(docs[i:i + chunk_size]) for i in range(0, len(docs), chunk_size)]
+        shift = np.cumsum([0] + [part.shape[0] for part in parts[:-1]]).astype(np.int64)
+        hits = HitMatrix(
+            np.concatenate([part.docs + s for part, s in zip(parts, shift)] or [np.empty(0, np.int64)]),
+            np.concatenate([part.cols for part in parts] or [np.empty(0, np.int64)]),
+            self.keywords, len(docs),
+        )
+        return CorpusScores(hits, self.is_positive)
+
+
+def score_corpus(texts, lex=None):
+    '''
+        Vectorized analyze_sentiment over many texts -> CorpusScores
+        (use .results() for the per-article dicts)
+    '''
+    return BatchScorer(lex).score(texts)
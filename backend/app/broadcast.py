@@ -0,0 +1,142 @@
+import asyncio
+from collections import deque
+from contextlib import contextmanager
+import json
+import os
+import uuid
+
+# Events queued per client; a client that falls further behind is reset
+CLIENT_BUFFER = int(os.getenv("STREAM_CLIENT_BUFFER", "64"))
+# Recent events kept for reconnects (SSE Last-Event-ID)
+HISTORY_SIZE = int(os.getenv("STREAM_HISTORY", "256"))
+# Seconds between keep-alives on an idle stream
+HEARTBEAT = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+
+
+class Event:
+    '''
+        One published event, serialized once for every subscriber
+    '''
+
+    def __init__(self, event_id, name, data, seq=None):
+        self.id = event_id
+        self.seq = seq  # position in this boot's stream
+        self.name = name
+        self.data = data  # JSON text
+        id_line = f"id: {event_id}\n" if event_id is not None else ""
+        self.sse = f"{id_line}event: {name}\ndata: {data}\n\n".encode()
+        self.message = f'{{"id": {json.dumps(event_id)}, "event": "{name}", "data": {data}}}'
+
+
+# Sent instead of the events a slow client missed: refetch, then go on
+RESET = Event(None, "reset", "{}")
+
+
+class Subscriber:
+    def __init__(self, size=CLIENT_BUFFER):
+        self.queue = asyncio.Queue(maxsize=size)
+        self.resets = 0
+
+    def offer(self, event):
+        '''
+            Never blocks the publisher: a full buffer is dropped and replaced
+            by RESET, so a stalled client costs at most `size` events
+        '''
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESET)
+            self.resets += 1
+
+    async def get(self, timeout=HEARTBEAT):
+        '''
+            Next event, or None after `timeout` seconds without one
+        '''
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Broadcaster:
+    '''
+    Fan-out of ingest results to the open streams (SSE and WebSocket).
+
+    publish() serializes an event once and hands the same bytes to every
+    subscriber's bounded queue, so a viewer costs a queue slot, not a query
+    or a json.dumps. Lives on the event loop; ingest threads go through
+    publish_threadsafe().
+    '''
+
+    def __init__(self, buffer=CLIENT_BUFFER, history=HISTORY_SIZE):
+        self.buffer = buffer
+        self._subscribers = set()
+        self._history = deque(maxlen=history)
+        # ids are "<boot>-<seq>": random per start, so an id from before a
+        # restart is never mistaken for one of ours
+        self._boot = uuid.uuid4().hex[:8]
+        self._seq = 0  # last published
+        self._loop = None
+
+    @property
+    def listening(self):
+        return bool(self._subscribers)
+
+    def publish(self, name, data):
+        '''
+            Event loop only. `data` is the JSON text of the payload
+        '''
+        self._seq += 1
+        event = Event(f"{self._boot}-{self._seq}", name, data, self._seq)
+        self._history.append(event)
+        for subscriber in self._subscribers:
+            subscriber.offer(event)
+        return event
+
+    def publish_threadsafe(self, name, payload):
+        '''
+            From any thread; dropped when nobody has ever subscribed
+        '''
+        if self._loop is None:
+            return
+        data = json.dumps(payload)
+        self._loop.call_soon_threadsafe(self.publish, name, data)
+
+    def replay(self, last_event_id):
+        '''
+            Events after `last_event_id`, or [RESET] when we can't tell what
+            the client missed: the id is from another boot (restart) or not
+            one we published, or the events are no longer in the history
+        '''
+        if not last_event_id:
+            return []
+        boot, _, seq = last_event_id.partition("-")
+        try:
+            seq = int(seq)
+        except ValueError:
+            return [RESET]
+        if boot != self._boot or seq > self._seq:
+            return [RESET]
+        missed = [event for event in self._history if event.seq > seq]
+        if missed and missed[0].seq != seq + 1:
+            return [RESET]
+        if not missed and seq != self._seq:
+            return [RESET]
+        return missed
+
+    @contextmanager
+    def subscribe(self, last_event_id=None):
+        self._loop = asyncio.get_running_loop()
+        subscriber = Subscriber(self.buffer)
+        for event in self.replay(last_event_id):
+            subscriber.offer(event)
+        self._subscribers.add(subscriber)
+        try:
+            yield subscriber
+        finally:
+            self._subscribers.discard(subscriber)
+
+
+broadcaster = Broadcaster()
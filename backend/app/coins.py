@@ -1,61 +1,22 @@
-COIN_KEYWORDS = {
-    "BTC": ["bitcoin", "btc"],
-    "ETH": ["ethereum", "eth", "ether"],
-    "BNB": ["bnb", "binance coin"],
-    "SOL": ["solana", "sol"],
-    "XRP": ["ripple", "xrp"],
-    "RENDER": ["Render", "render"],
-    "WLD": ["Worldcoin", "wld"],
-    "ADA": ["cardano", "ada"],
-    "AVAX": ["avalanche", "avax"],
-    "HYPE": ["Hyperliquid", "hype"],
-    "DOT": ["polkadot", "dot"],
-    "TON": ["Toncoin", "ton"],
-    "TRX": ["tron", "trx"],
-    "MATIC": ["polygon", "matic"],
-    "NEAR": ["near protocol", "near"],
-    "ATOM": ["cosmos", "atom"],
-    "FTM": ["fantom", "ftm"],
-    "ONDO": ["ondo"],
-    "DOGE": ["dogecoin", "doge"],
-    "SUI": ["Sui", "sui"],
-    "SHIB": ["shiba inu", "shib"],
-    "PEPE": ["pepe"],
-    "BOME": ["bome"],
-    "WIF": ["dogwifhat", "wif"],
-    "FLOKI": ["floki"],
-    "BONK": ["bonk"],
-    "UNI": ["uniswap", "uni"],
-    "LINK": ["chainlink", "link"],
-    "AAVE": ["aave"],
-    "LDO": ["lido", "ldo"],
-    "MKR": ["maker", "mkr"],
-    "CRV": ["curve dao", "crv"],
-    "SUSHI": ["sushiswap", "sushi"],
-    "DYDX": ["dydx"],
-    "BITGET": ["bitget", "bgb"],
-    "OP": ["optimism", "op"],
-    "ARB": ["arbitrum", "arb"],
-    "IMX": ["immutable x", "imx"],
-    "QNT": ["Quant", "qnt"],
-    "MANA": ["decentraland", "mana"],
-    "AXS": ["axie infinity", "axs"],
-    "GALA": ["gala"],
-    "LTC": ["litecoin", "ltc"],
-    "BCH": ["bitcoin cash", "bch"],
-    "XLM": ["stellar", "xlm"],
-    "XMR": ["monero", "xmr"],
-    "ETC": ["ethereum classic", "etc"],
-    "FIL": ["filecoin", "fil"],
-    "ICP": ["internet computer", "icp"],
-    "VET": ["vechain", "vet"],
-    "HBAR": ["hedera", "hbar"]
-}
+from . import lexicon
+
+# Coin tickers + aliases live in data/lexicon.json (hot-reloaded, see lexicon.py)
+
+# Not a metrics stage: ingest gets its coins from the combined scan
+# (sentiment_analysis.exact_pass, stage "exact_match"); this is only used
+# when just the coins of a text are needed
+def identify_coins_in_text(text, whole_words=True, lex=None):
+    '''
+    whole_words=False keeps the old plain-substring behaviour, where "sol"
+    also hits "solution" and "eth" hits "whether"
+    '''
+    lex = lex or lexicon.current()
+    if whole_words:
+        return sorted(lex.coin_matcher.scan(text)["coins"])
 
-def identify_coins_in_text(text):
     found_coins = set()
     text_lower = text.lower()
-    for ticker, keywords in COIN_KEYWORDS.items():
+    for ticker, keywords in lex.coins.items():
         for keyword in keywords:
             if keyword in text_lower:
                 found_coins.add(ticker)
@@ -72,7 +33,8 @@ if __name__ == '__main__':
         ("Ethereum and Ripple are soaring, but Solana faces issues.", ["ETH", "XRP", "SOL"]),
         ("What is the future of dogecoin?", ["DOGE"]),
         ("This article is about general market trends.", []),
-        ("ETH's new upgrade is live!", ["ETH"])
+        ("ETH's new upgrade is live!", ["ETH"]),
+        ("Whether the top solution lasts tons of countdowns", []),
     ]
 
     for i, (text, expected) in enumerate(test_cases, 1):
@@ -1,8 +1,83 @@
-from sqlalchemy import create_engine
+import os
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 SQLITE_URL = "sqlite:///./news.db"
 # DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./patterns.db")
 
-engine = create_engine(SQLITE_URL, connect_args={"check_same_thread": False}, echo=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+# Log every SQL statement (very noisy during ingest), off unless SQL_ECHO=true
+SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() in ("1", "true", "yes")
+
+# "wal": WAL journal, read-only pool for the API, every write through the
+# single writer thread (app/writer.py). "rollback": one engine, SQLite's
+# default journal, writes from the request / ingest sessions (the old setup)
+STORAGE_MODE = os.getenv("STORAGE_MODE", "wal").lower()
+READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "8"))
+# NDJSON exports hold a connection for the whole download, so they get their
+# own pool and the API reads never queue behind them; a full pool -> 503
+EXPORT_POOL_SIZE = int(os.getenv("DB_EXPORT_POOL_SIZE", "2"))
+EXPORT_POOL_TIMEOUT = float(os.getenv("DB_EXPORT_POOL_TIMEOUT", "1"))
+# ms a connection waits for a lock before "database is locked"
+BUSY_TIMEOUT = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+# SQLite caps bound parameters per statement (999 on older builds), so
+# IN (...) lists are sent in chunks of this many
+IN_CHUNK_SIZE = 900
+
+
+def make_engines(url=SQLITE_URL, mode=STORAGE_MODE, read_pool_size=READ_POOL_SIZE, echo=SQL_ECHO):
+    '''
+        (write engine, read engine); the same engine twice in "rollback" mode
+    '''
+    connect_args = {"check_same_thread": False}
+    if mode != "wal":
+        engine = create_engine(url, connect_args=connect_args, echo=echo)
+        return engine, engine
+
+    # One connection: the writer thread (and startup) are the only writers
+    write_engine = create_engine(url, connect_args=connect_args, echo=echo, pool_size=1, max_overflow=0)
+    read_engine = make_read_engine(url, read_pool_size, echo=echo)
+
+    @event.listens_for(write_engine, "connect")
+    def setup_writer(dbapi_connection, record):
+        # SQLAlchemy emits BEGIN itself (see below), so SAVEPOINTs work in pysqlite
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # in WAL mode NORMAL only syncs at checkpoints and is still crash-safe
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT}")
+        cursor.close()
+
+    @event.listens_for(write_engine, "begin")
+    def begin_immediate(conn):
+        # take the write lock up front instead of failing halfway through
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return write_engine, read_engine
+
+
+def make_read_engine(url=SQLITE_URL, pool_size=READ_POOL_SIZE, pool_timeout=30, echo=SQL_ECHO):
+    '''
+        Read-only connections, at most `pool_size` of them
+    '''
+    read_engine = create_engine(
+        url, connect_args={"check_same_thread": False}, echo=echo,
+        pool_size=pool_size, max_overflow=0, pool_timeout=pool_timeout,
+    )
+
+    @event.listens_for(read_engine, "connect")
+    def setup_reader(dbapi_connection, record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT}")
+        cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+    return read_engine
+
+
+engine, read_engine = make_engines()
+export_engine = make_read_engine(pool_size=EXPORT_POOL_SIZE, pool_timeout=EXPORT_POOL_TIMEOUT)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+ExportSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=export_engine)
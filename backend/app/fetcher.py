@@ -0,0 +1,149 @@
+import asyncio
+import time
+
+import httpx
+
+from . import metrics
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    pass
+
+
+class CryptoPanicFetcher:
+    '''
+    Async CryptoPanic client on one pooled httpx.AsyncClient.
+
+    - page 1 first; if the API reports a `next` page, pages 2..max_pages are
+      requested concurrently (bounded by `concurrency`). A failing later page
+      is logged and skipped, the pages that loaded are still returned
+    - 429/5xx and transport errors are retried with exponential backoff,
+      Retry-After and X-RateLimit-Remaining/Reset are honored
+    - ETag / Last-Modified are sent back as If-None-Match / If-Modified-Since,
+      a 304 reuses the results we already have for that page
+    '''
+
+    def __init__(self, base_url, params, max_pages=1, concurrency=4, max_retries=3,
+                 backoff=0.5, timeout=10.0, client=None):
+        self.base_url = base_url
+        self.params = dict(params)
+        self.max_pages = max_pages
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.client = client or httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        )
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # page -> (etag, last_modified, payload)
+        self._validators = {}
+        # monotonic time before which no request may go out (rate limit)
+        self._not_before = 0.0
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def fetch(self):
+        '''
+            Results of pages 1..max_pages, in page order, without duplicate ids
+        '''
+        first = await self.fetch_page(1)
+        pages = [first]
+        if first.get("next") and self.max_pages > 1:
+            later = await asyncio.gather(*(
+                self.fetch_page(page) for page in range(2, self.max_pages + 1)
+            ), return_exceptions=True)
+            for payload in later:
+                if isinstance(payload, Exception):
+                    # page 1 failing still raises; a later one only costs its own results
+                    metrics.fetch_errors.inc()
+                    print("[FETCH] Skipping page:", payload)
+                    continue
+                if isinstance(payload, BaseException):
+                    raise payload
+                pages.append(payload)
+
+        results, seen = [], set()
+        for payload in pages:
+            for item in payload.get("results", []):
+                if item.get("id") in seen:
+                    continue
+                seen.add(item.get("id"))
+                results.append(item)
+        return results
+
+    async def fetch_page(self, page):
+        params = dict(self.params)
+        if page > 1:
+            params["page"] = page
+
+        headers = {}
+        etag, last_modified, cached = self._validators.get(page, (None, None, None))
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        response = await self.request(params, headers)
+        if response.status_code == 304 and cached is not None:
+            return cached
+        if response.status_code == 404 and page > 1:
+            # past the last page
+            return {}
+
+        try:
+            response.raise_for_status()
+            payload = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            raise FetchError(f"page {page}: {e}") from e
+
+        if response.headers.get("ETag") or response.headers.get("Last-Modified"):
+            self._validators[page] = (
+                response.headers.get("ETag"), response.headers.get("Last-Modified"), payload,
+            )
+        return payload
+
+    async def request(self, params, headers):
+        for attempt in range(self.max_retries + 1):
+            async with self._semaphore:
+                wait = self._not_before - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                try:
+                    response = await self.client.get(self.base_url, params=params, headers=headers)
+                except httpx.TransportError as e:
+                    if attempt == self.max_retries:
+                        raise FetchError(str(e)) from e
+                    await asyncio.sleep(self.backoff * 2 ** attempt)
+                    continue
+
+            self.note_rate_limit(response)
+            if response.status_code not in RETRY_STATUS or attempt == self.max_retries:
+                return response
+            await asyncio.sleep(self.retry_delay(response, attempt))
+        return response
+
+    def retry_delay(self, response, attempt):
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                pass
+        return self.backoff * 2 ** attempt
+
+    def note_rate_limit(self, response):
+        '''
+            Out of quota -> hold every request until the window resets
+        '''
+        if response.headers.get("X-RateLimit-Remaining") != "0":
+            return
+        try:
+            reset = float(response.headers.get("X-RateLimit-Reset", ""))
+        except ValueError:
+            return
+        # either seconds to wait or an epoch timestamp
+        delay = reset - time.time() if reset > 1e9 else reset
+        self._not_before = max(self._not_before, time.monotonic() + max(0.0, delay))
@@ -0,0 +1,185 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import hashlib
+import json
+import os
+import threading
+
+from .artifacts import artifact_path
+from .stringmatching.fuzzy import FuzzyMatcher
+from .stringmatching.fuzzy_index import FuzzyIndex
+from .stringmatching.keyword_matcher import KeywordMatcher
+
+# Coins + sentiment keywords, editable without a deploy
+LEXICON_PATH = os.getenv("LEXICON_PATH", os.path.join(os.path.dirname(__file__), "data", "lexicon.json"))
+# Seconds between checks of the lexicon file, <= 0 -> never reload
+LEXICON_POLL = float(os.getenv("LEXICON_POLL_SECONDS", "30"))
+
+
+def lexicon_version(*parts):
+    '''
+        Short hash of a lexicon, changes whenever any keyword does
+    '''
+    data = json.dumps(parts, sort_keys=True, default=sorted)
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def read_lexicon(path=LEXICON_PATH):
+    '''
+        (data, sha256 of the file). Raises ValueError if the file is not a
+        valid lexicon, so a half-edited file never replaces a working one
+    '''
+    with open(path, "rb") as f:
+        raw = f.read()
+    try:
+        data = json.loads(raw)
+        coins = data["coins"]
+        sentiment = data["sentiment"]
+        valid = (
+            all(isinstance(aliases, list) for aliases in coins.values())
+            and isinstance(sentiment["positive"], list)
+            and isinstance(sentiment["negative"], list)
+        )
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"{path}: invalid lexicon ({e})")
+    if not valid:
+        raise ValueError(f"{path}: invalid lexicon")
+    return data, hashlib.sha256(raw).hexdigest()
+
+
+class Lexicon:
+    '''
+    One immutable version of the keyword lists plus every matcher compiled
+    from them. A reload builds a new Lexicon and swaps it in; callers that
+    took the old one with current() finish their work on it.
+    '''
+
+    def __init__(self, data, file_hash=None):
+        self.data = data  # as read, to rebuild this exact version elsewhere
+        self.coins = data["coins"]
+        self.keywords = {
+            "positive": list(data["sentiment"]["positive"]),
+            "negative": list(data["sentiment"]["negative"]),
+        }
+        self.hash = file_hash
+
+        # Matchers come from the artifacts when they were built from the same
+        # dictionaries (see KeywordMatcher.cached)
+        self.coin_matcher = KeywordMatcher.cached({"coins": self.coins}, artifact_path("coins"))
+        # Coins + sentiment lexicon in one automaton, so an article is scanned once
+        self.matcher = KeywordMatcher.cached({
+            "coins": self.coins,
+            "positive": {kw: [kw] for kw in self.keywords["positive"]},
+            "negative": {kw: [kw] for kw in self.keywords["negative"]},
+        }, artifact_path("sentiment"))
+        self.fuzzy = FuzzyMatcher()
+        self.fuzzy_index = FuzzyIndex(self.keywords["positive"] + self.keywords["negative"], matcher=self.fuzzy)
+
+        # Per-component versions for the analysis cache: editing the sentiment
+        # keywords leaves the cached coin results valid and the other way around
+        self.versions = {
+            "coins": lexicon_version(self.coins),
+            "sentiment": lexicon_version(self.keywords, self.fuzzy.threshold),
+        }
+
+    @classmethod
+    def from_file(cls, path=LEXICON_PATH):
+        data, file_hash = read_lexicon(path)
+        return cls(data, file_hash)
+
+
+_current = None
+_lock = threading.Lock()
+_compile_pool = None
+
+
+def current():
+    '''
+        Lexicon in use right now. Take it once per unit of work (an article,
+        a batch) so a concurrent reload cannot mix two versions
+    '''
+    global _current
+    if _current is None:
+        with _lock:
+            if _current is None:
+                _current = Lexicon.from_file()
+    return _current
+
+
+def swap(lexicon):
+    global _current
+    # a single reference assignment, readers see either the old or the new one
+    _current = lexicon
+
+
+def reload(path=LEXICON_PATH):
+    '''
+        Rebuild in this process if the file changed; True if swapped
+    '''
+    data, file_hash = read_lexicon(path)
+    if _current is not None and _current.hash == file_hash:
+        return False
+    swap(Lexicon(data, file_hash))
+    return True
+
+
+def compile_artifacts(path=LEXICON_PATH):
+    '''
+        Runs in a child process: compiles the automata and writes the
+        artifacts, so the server's own threads keep matching meanwhile
+    '''
+    return Lexicon.from_file(path).hash
+
+
+def get_compile_pool():
+    '''
+        One worker process, reused by every reload (shut down by the lifespan)
+    '''
+    global _compile_pool
+    if _compile_pool is None:
+        _compile_pool = ProcessPoolExecutor(max_workers=1)
+    return _compile_pool
+
+
+def shutdown_compile_pool():
+    global _compile_pool
+    if _compile_pool is not None:
+        _compile_pool.shutdown(wait=False, cancel_futures=True)
+        _compile_pool = None
+
+
+async def reload_in_background(path=LEXICON_PATH):
+    '''
+        If the file changed: compile in a separate process, then load the
+        fresh artifacts (memory-mapped, milliseconds) and swap
+    '''
+    _, file_hash = read_lexicon(path)
+    if current().hash == file_hash:
+        return False
+
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(get_compile_pool(), compile_artifacts, path)
+    except BrokenProcessPool:
+        # the worker died (e.g. OOM): start a fresh one next time
+        shutdown_compile_pool()
+        raise
+    lexicon = await loop.run_in_executor(None, Lexicon.from_file, path)
+    swap(lexicon)
+    print("[LEXICON] Reloaded", path, lexicon.hash[:12])
+    return True
+
+
+async def watch(path=LEXICON_PATH, interval=LEXICON_POLL):
+    '''
+        Lifespan task: pick up edits to the lexicon file
+    '''
+    if interval <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await reload_in_background(path)
+        except Exception as e:
+            print("[LEXICON] Reload failed, keeping the current lexicon:", e)
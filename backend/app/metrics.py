@@ -0,0 +1,186 @@
+import asyncio
+from bisect import bisect_left
+from functools import wraps
+import os
+import threading
+import time
+
+# METRICS_ENABLED=false turns every hook into the bare function (decided at
+# import, so a disabled hook costs nothing per call)
+ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# seconds; matching phases are sub-millisecond, fetch / commit are not
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+
+
+def _label_text(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def labels(self, *values):
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{_label_text(self.labelnames, values)} {_number(child.value)}"]
+
+
+class _HistogramChild:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def _render_child(self, values, child):
+        lines, cumulative = [], 0
+        for bound, count in zip(self.bounds + (float("inf"),), child.counts):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{_label_text(self.labelnames, values, [('le', _number(bound))])} {cumulative}")
+        labels = _label_text(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_number(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def render():
+    '''
+        Every metric in the Prometheus text exposition format (0.0.4)
+    '''
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Stages: fetch, analyze (cache lookup + matching), exact_match (coin
+# detection and exact sentiment keywords, one automaton scan), fuzzy_match,
+# insert, db_write. Coins have no stage of their own, they are in exact_match
+stage_seconds = Histogram(
+    "chainpulse_stage_seconds", "Time spent per pipeline stage", ["stage"],
+)
+articles_processed = Counter(
+    "chainpulse_articles_processed_total", "Fetched articles that went through analysis",
+)
+analysis_cache = Counter(
+    "chainpulse_analysis_cache_total", "Analysis cache lookups", ["result"],
+)
+keyword_matches = Counter(
+    "chainpulse_keyword_matches_total", "Sentiment keywords found", ["kind"],
+)
+coin_matches = Counter(
+    "chainpulse_coin_matches_total", "Coins detected in articles",
+)
+db_rows = Counter(
+    "chainpulse_db_rows_inserted_total", "News rows written to the database",
+)
+response_cache = Counter(
+    "chainpulse_response_cache_total", "Cached read endpoint requests", ["result"],
+)
+fetch_errors = Counter(
+    "chainpulse_fetch_errors_total", "Failed CryptoPanic fetches",
+)
+
+
+def timed(stage):
+    '''
+        Decorator: observe the call's duration in stage_seconds{stage=...}.
+        Works on plain and async functions; a no-op when metrics are off.
+        Work done in the process pool is timed in the workers and not seen here
+    '''
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+        observe = stage_seconds.labels(stage).observe
+        clock = time.perf_counter
+
+        if asyncio.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def timed_async(*args, **kwargs):
+                start = clock()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    observe(clock() - start)
+            return timed_async
+
+        @wraps(fn)
+        def timed_call(*args, **kwargs):
+            start = clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(clock() - start)
+        return timed_call
+    return decorate
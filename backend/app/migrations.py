@@ -0,0 +1,102 @@
+import uuid
+
+from sqlalchemy import text
+
+from .models import Base, News, articles_fts
+
+# Key, time and score come from article_coins so a ticker filter walks
+# ix_article_coins_coin_ticker_published_at in ORDER BY order; only the
+# text is looked up in articles
+NEWS_VIEW = '''
+CREATE VIEW IF NOT EXISTS news AS
+SELECT ac.article_id AS id, a.title, a.description, ac.coin_ticker, ac.published_at, ac.sentiment_score
+FROM article_coins ac JOIN articles a ON a.id = ac.article_id
+'''
+
+# External-content FTS5 index: the text lives in articles only, the triggers
+# keep the index in step inside the inserting transaction
+ARTICLES_FTS = '''
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, description, content='articles', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+)
+'''
+ARTICLES_FTS_TRIGGERS = [
+    '''
+    CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+        INSERT INTO articles_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+        INSERT INTO articles_fts (articles_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE OF title, description ON articles BEGIN
+        INSERT INTO articles_fts (articles_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO articles_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    ''',
+]
+
+
+def object_type(conn, name):
+    '''
+        "table", "view" or None
+    '''
+    return conn.execute(
+        text("SELECT type FROM sqlite_master WHERE name = :name"), {"name": name}
+    ).scalar()
+
+
+def migrate_news_table(conn):
+    '''
+        Old news.db: `news` was a table with the article text repeated for
+        every coin. Copy it into articles + article_coins, then drop it so
+        the view can take its name. Idempotent, one transaction
+    '''
+    # one row per article (the copies only differ in coin_ticker)
+    conn.execute(text('''
+        INSERT OR IGNORE INTO articles (id, title, description, published_at, sentiment_score)
+        SELECT id, title, description, published_at, sentiment_score
+        FROM news GROUP BY id
+    '''))
+    conn.execute(text('''
+        INSERT OR IGNORE INTO article_coins (article_id, coin_ticker, published_at, sentiment_score)
+        SELECT n.id, n.coin_ticker, a.published_at, a.sentiment_score
+        FROM news n JOIN articles a ON a.id = n.id
+    '''))
+    conn.execute(text("DROP TABLE news"))
+
+
+def create_schema(engine):
+    '''
+        Tables + indexes, migration of an old `news` table, compatibility
+        view, full-text index
+    '''
+    Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist, so add new indexes to old files
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+    with engine.begin() as conn:
+        if object_type(conn, News.__tablename__) == "table":
+            print("[DB] Migrating the news table to articles + article_coins")
+            migrate_news_table(conn)
+        conn.execute(
+            text("INSERT OR IGNORE INTO data_version (id, token, version) VALUES (1, :token, 0)"),
+            {"token": uuid.uuid4().hex[:8]},
+        )
+        conn.execute(text(NEWS_VIEW))
+
+        new_index = object_type(conn, articles_fts.name) is None
+        conn.execute(text(ARTICLES_FTS))
+        for trigger in ARTICLES_FTS_TRIGGERS:
+            conn.execute(text(trigger))
+        if new_index:
+            # articles stored before the index existed
+            conn.execute(text("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')"))
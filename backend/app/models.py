@@ -1,12 +1,58 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, PrimaryKeyConstraint
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, PrimaryKeyConstraint, Index, Table
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
+# Views and virtual tables, never created by Base.metadata.create_all (see migrations.py)
+ViewBase = declarative_base()
 
-class News(Base):
+class Article(Base):
+    '''
+    One fetched article: text and score stored once, however many coins
+    it mentions
+    '''
+    __tablename__ = "articles"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String)
+    description = Column(String)
+    published_at = Column(DateTime)
+    sentiment_score = Column(Float)
+
+    __table_args__ = (
+        # Newest-first pages of /api/articles
+        Index('ix_articles_published_at_id', 'published_at', 'id'),
+    )
+
+class ArticleCoin(Base):
+    '''
+    Which coins an article mentions, one row per coin. published_at and
+    sentiment_score are copies of the article's (articles are never updated),
+    so per-ticker pages and aggregates never have to visit `articles`
+    '''
+    __tablename__ = "article_coins"
+
+    article_id = Column(Integer, ForeignKey("articles.id"), nullable=False)
+    coin_ticker = Column(String, nullable=False)
+    published_at = Column(DateTime)
+    sentiment_score = Column(Float)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('article_id', 'coin_ticker'),
+        # Newest-first pages of one ticker in index order; sentiment_score
+        # makes the summary / rollup rebuild index-only
+        Index('ix_article_coins_coin_ticker_published_at', 'coin_ticker', 'published_at', 'article_id', 'sentiment_score'),
+        # Same for the unfiltered /api/news and export
+        Index('ix_article_coins_published_at', 'published_at', 'article_id', 'coin_ticker'),
+    )
+
+class News(ViewBase):
+    '''
+    Read-only compatibility view: the old one-row-per-(article, coin) shape,
+    articles JOIN article_coins. /api/news, summary and export read it
+    '''
     __tablename__ = "news"
 
-    id = Column(Integer, nullable=False)  
+    id = Column(Integer, nullable=False)
     title = Column(String)
     description = Column(String)
     coin_ticker = Column(String, nullable=False)
@@ -15,4 +61,73 @@ class News(Base):
 
     __table_args__ = (
         PrimaryKeyConstraint('id', 'coin_ticker'),
-    )
\ No newline at end of file
+    )
+
+# FTS5 index over articles.title / description, rowid = articles.id; `rank`
+# is bm25 (lower is better) and only defined in a MATCH query
+articles_fts = Table(
+    "articles_fts", ViewBase.metadata,
+    Column("rowid", Integer, primary_key=True),
+    Column("title", String),
+    Column("description", String),
+    Column("rank", Float),
+)
+
+class IngestState(Base):
+    '''
+    High-watermark of the ingest: newest (published_at, id) already processed
+    for a source, so each poll only analyzes what is newer
+    '''
+    __tablename__ = "ingest_state"
+
+    source = Column(String, primary_key=True)
+    published_at = Column(DateTime)
+    last_id = Column(Integer)
+
+
+class AnalysisResult(Base):
+    '''
+    Cached analysis of one article text, per component ("coins" or
+    "sentiment"), valid while `version` matches that component's lexicon
+    '''
+    __tablename__ = "analysis_cache"
+
+    content_hash = Column(String, nullable=False)
+    component = Column(String, nullable=False)
+    version = Column(String, nullable=False)
+    result = Column(String, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('content_hash', 'component'),
+    )
+
+
+class DataVersion(Base):
+    '''
+    One row (id 1): bumped by every transaction that adds news, so all
+    server processes agree on when cached responses went stale
+    '''
+    __tablename__ = "data_version"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    token = Column(String, nullable=False)  # random per database file
+    version = Column(Integer, nullable=False)
+
+
+class SentimentRollup(Base):
+    '''
+    Per coin, per time bucket aggregates of sentiment_score, kept up to date
+    by the insert so charts never scan the news table
+    '''
+    __tablename__ = "sentiment_rollup"
+
+    coin_ticker = Column(String, nullable=False)
+    resolution = Column(String, nullable=False)  # "5m", "1h", "1d"
+    bucket = Column(DateTime, nullable=False)  # bucket start (UTC)
+    count = Column(Integer, nullable=False)
+    score_sum = Column(Float, nullable=False)
+    score_sumsq = Column(Float, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('resolution', 'coin_ticker', 'bucket'),
+    )
@@ -0,0 +1,61 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import os
+
+from . import lexicon
+from .sentiment_analysis import analyze_article_batch
+
+# Below this many texts the pool costs more than it saves
+POOL_MIN_BATCH = int(os.getenv("INGEST_POOL_MIN_BATCH", "200"))
+CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "64"))
+WORKERS = int(os.getenv("INGEST_WORKERS", "0")) or os.cpu_count() or 1
+
+_pool = None
+
+
+def _init_worker():
+    # Load the matchers (memory-mapped artifacts) once per worker process
+    lexicon.current()
+
+
+def _analyze_chunk(lexicon_hash, lexicon_data, texts):
+    # Worker on another version than the parent's: build the parent's from its
+    # data, not from the file, which may have changed again since (the
+    # results are cached under the parent's versions)
+    if lexicon.current().hash != lexicon_hash:
+        lexicon.swap(lexicon.Lexicon(lexicon_data, lexicon_hash))
+    return analyze_article_batch(texts)
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=WORKERS, initializer=_init_worker)
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+def analyze_articles(texts, lex=None):
+    '''
+    analyze_article for every text, same order as the input.
+
+    String matching is pure Python and holds the GIL, so large batches are
+    split into chunks and spread over a process pool; small ones (the usual
+    refresh) stay in-process.
+    '''
+    texts = list(texts)
+    lex = lex or lexicon.current()
+    if WORKERS <= 1 or len(texts) < POOL_MIN_BATCH:
+        return analyze_article_batch(texts, lex)
+
+    chunks = [texts[i:i + CHUNK_SIZE] for i in range(0, len(texts), CHUNK_SIZE)]
+    results = []
+    for part in get_pool().map(partial(_analyze_chunk, lex.hash, lex.data), chunks):
+        results.extend(part)
+    return results
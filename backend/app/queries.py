@@ -0,0 +1,267 @@
+import base64
+import json
+import re
+from datetime import datetime
+
+from sqlalchemy import and_, func, literal_column, or_, select, tuple_
+
+from .models import Article, ArticleCoin, News, articles_fts
+
+NEWS_FIELDS = ["id", "title", "description", "coin_ticker", "published_at", "sentiment_score"]
+# (published_at, id, coin_ticker) is unique, coin_ticker only breaks ties
+# between the rows of one article
+KEY_FIELDS = ["published_at", "id", "coin_ticker"]
+
+
+class QueryError(ValueError):
+    pass
+
+
+def parse_fields(fields):
+    '''
+        "id,title" -> ["id", "title"]; None -> every column
+    '''
+    if not fields:
+        return list(NEWS_FIELDS)
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in NEWS_FIELDS]
+    if unknown:
+        raise QueryError(f"Unknown field(s): {', '.join(unknown)}")
+    return names
+
+
+def parse_tickers(tickers):
+    '''
+        ["BTC,ETH", "sol"] -> ["BTC", "ETH", "SOL"]
+    '''
+    if not tickers:
+        return []
+    return [t.strip().upper() for value in tickers for t in value.split(",") if t.strip()]
+
+
+def encode_cursor(row):
+    published_at = row["published_at"]
+    key = [published_at.isoformat() if published_at else None, row["id"], row["coin_ticker"]]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        published_at, news_id, ticker = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (datetime.fromisoformat(published_at) if published_at else None, int(news_id), str(ticker))
+    except Exception:
+        raise QueryError("Invalid cursor")
+
+
+def news_select(fields, tickers=None, since=None, until=None, min_abs_score=None):
+    '''
+        SELECT of `fields` (+ the keyset columns), newest first, with filters
+    '''
+    columns = [getattr(News, name) for name in dict.fromkeys(fields + KEY_FIELDS)]
+    statement = select(*columns)
+
+    if tickers:
+        statement = statement.where(News.coin_ticker.in_(tickers))
+    if since is not None:
+        statement = statement.where(News.published_at >= since)
+    if until is not None:
+        statement = statement.where(News.published_at < until)
+    if min_abs_score is not None:
+        statement = statement.where(func.abs(News.sentiment_score) >= min_abs_score)
+
+    # SQLite sorts NULL published_at last in DESC order
+    return statement.order_by(News.published_at.desc(), News.id.desc(), News.coin_ticker.desc())
+
+
+def after_cursor(statement, cursor):
+    '''
+        Keyset condition: rows strictly after `cursor` in news_select order
+    '''
+    published_at, news_id, ticker = decode_cursor(cursor)
+    same_time_after = tuple_(News.id, News.coin_ticker) < (news_id, ticker)
+    if published_at is None:
+        return statement.where(and_(News.published_at.is_(None), same_time_after))
+    return statement.where(or_(
+        News.published_at < published_at,
+        and_(News.published_at == published_at, same_time_after),
+        News.published_at.is_(None),
+    ))
+
+
+def serialize(row, fields):
+    item = {}
+    for name in fields:
+        value = row[name]
+        item[name] = value.isoformat() if isinstance(value, datetime) else value
+    return item
+
+
+# ================= Articles (one row per article, coins as a list) =================
+def encode_article_cursor(row):
+    published_at = row["published_at"]
+    key = [published_at.isoformat() if published_at else None, row["id"]]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_article_cursor(cursor):
+    try:
+        published_at, article_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (datetime.fromisoformat(published_at) if published_at else None, int(article_id))
+    except Exception:
+        raise QueryError("Invalid cursor")
+
+
+def articles_select(tickers=None, since=None, until=None):
+    '''
+        Articles newest first, each with its coins (comma-joined, see
+        serialize_article); `tickers` keeps articles mentioning any of them
+    '''
+    statement = article_filters(select(*article_columns()), tickers, since, until)
+    return statement.order_by(Article.published_at.desc(), Article.id.desc())
+
+
+def article_columns():
+    coins = (
+        select(func.group_concat(ArticleCoin.coin_ticker))
+        .where(ArticleCoin.article_id == Article.id)
+        .scalar_subquery()
+        .label("coins")
+    )
+    return [Article.id, Article.title, Article.description, Article.published_at, Article.sentiment_score, coins]
+
+
+def article_filters(statement, tickers=None, since=None, until=None, id_column=Article.id):
+    if tickers:
+        # correlated on the (article_id, coin_ticker) PK: checked per candidate
+        # row, so a LIMITed page stops early instead of listing every article
+        # of the ticker first
+        statement = statement.where(
+            select(ArticleCoin.article_id)
+            .where(ArticleCoin.article_id == id_column, ArticleCoin.coin_ticker.in_(tickers))
+            .exists()
+        )
+    if since is not None:
+        statement = statement.where(Article.published_at >= since)
+    if until is not None:
+        statement = statement.where(Article.published_at < until)
+    return statement
+
+
+def after_article_cursor(statement, cursor):
+    '''
+        Keyset condition: articles strictly after `cursor` in articles_select order
+    '''
+    published_at, article_id = decode_article_cursor(cursor)
+    if published_at is None:
+        return statement.where(and_(Article.published_at.is_(None), Article.id < article_id))
+    return statement.where(or_(
+        Article.published_at < published_at,
+        and_(Article.published_at == published_at, Article.id < article_id),
+        Article.published_at.is_(None),
+    ))
+
+
+def serialize_article(row):
+    return {
+        "id": row["id"],
+        "title": row["title"],
+        "description": row["description"],
+        "coins": sorted(row["coins"].split(",")) if row["coins"] else [],
+        "published_at": row["published_at"].isoformat() if row["published_at"] else None,
+        "sentiment_score": row["sentiment_score"],
+    }
+
+
+# ================= Full-text search (articles_fts) =================
+SEARCH_ORDERS = ("rank", "recent")
+# "quoted phrase", word or prefix* ; everything else is a separator
+SEARCH_TOKEN = re.compile(r'"([^"]*)"|([^\s"]+)')
+
+
+def fts_query(q):
+    '''
+        User input -> FTS5 query: every "phrase" / word must match, word* is
+        a prefix. Each term is quoted, so FTS5 operators in the input are
+        plain text and never a syntax error
+    '''
+    terms = []
+    for phrase, word in SEARCH_TOKEN.findall(q or ""):
+        prefix = bool(word) and word.endswith("*")
+        value = (phrase or word).rstrip("*") if prefix else (phrase or word)
+        if not re.search(r"\w", value):
+            continue
+        terms.append('"' + value.replace('"', '""') + '"' + ("*" if prefix else ""))
+    if not terms:
+        raise QueryError("Empty search query")
+    return " ".join(terms)
+
+
+def encode_search_cursor(row):
+    return base64.urlsafe_b64encode(json.dumps([row["rank"], row["id"]]).encode()).decode()
+
+
+def decode_search_cursor(cursor):
+    try:
+        rank, article_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (None if rank is None else float(rank), int(article_id))
+    except Exception:
+        raise QueryError("Invalid cursor")
+
+
+def search_select(q, tickers=None, since=None, until=None, order="rank"):
+    '''
+        Ids (+ rank) of the articles matching `q`: best bm25 first ("rank"),
+        or highest id first ("recent": CryptoPanic ids grow with time, and
+        FTS5 streams that order without scoring every match).
+        Pass it to search_page for the article columns
+    '''
+    if order not in SEARCH_ORDERS:
+        raise QueryError(f"order must be one of {', '.join(SEARCH_ORDERS)}")
+    rowid = articles_fts.c.rowid
+    rank = articles_fts.c.rank if order == "rank" else literal_column("NULL")
+    statement = select(rowid.label("id"), rank.label("rank")).where(
+        literal_column("articles_fts").op("MATCH")(fts_query(q))
+    )
+    if since is not None or until is not None:
+        statement = statement.join(Article, Article.id == rowid)
+    statement = article_filters(statement, tickers, since, until, id_column=rowid)
+    if order == "rank":
+        return statement.order_by(articles_fts.c.rank, rowid)
+    return statement.order_by(rowid.desc())
+
+
+def after_search_cursor(statement, cursor, order="rank"):
+    '''
+        Keyset condition: matches strictly after `cursor` in search_select order
+    '''
+    rank, article_id = decode_search_cursor(cursor)
+    if order == "rank":
+        if rank is None:
+            raise QueryError("Invalid cursor")
+        return statement.where(or_(
+            articles_fts.c.rank > rank,
+            and_(articles_fts.c.rank == rank, articles_fts.c.rowid > article_id),
+        ))
+    return statement.where(articles_fts.c.rowid < article_id)
+
+
+def search_page(statement, limit, order="rank"):
+    '''
+        First `limit` matches of a search_select with their article columns:
+        the coins subquery and row lookups run for the page only, not for
+        every match the ranking had to sort
+    '''
+    page = statement.limit(limit).subquery()
+    ordering = [page.c.rank, page.c.id] if order == "rank" else [page.c.id.desc()]
+    return (
+        select(*article_columns(), page.c.rank)
+        .join_from(page, Article, Article.id == page.c.id)
+        .order_by(*ordering)
+    )
+
+
+def serialize_search(row):
+    item = serialize_article(row)
+    if row["rank"] is not None:
+        item["rank"] = row["rank"]
+    return item
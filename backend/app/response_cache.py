@@ -0,0 +1,174 @@
+from collections import OrderedDict
+import gzip
+import hashlib
+import os
+import time
+
+from sqlalchemy import select, update
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+
+from . import metrics
+from .models import DataVersion
+
+# Read endpoints whose body only depends on the query string and the stored news
+CACHED_PATHS = {
+    "/api/news",
+    "/api/articles",
+    "/api/news/search",
+    "/api/sentiment/summary",
+    "/api/sentiment/timeseries",
+}
+# Memory for cached bodies (plain + gzip), 0 -> no caching, ETag / 304 stay on
+MAX_BYTES = int(float(os.getenv("RESPONSE_CACHE_MB", "64")) * 2**20)
+# Smaller bodies are not worth a gzip header
+GZIP_MIN_SIZE = 1024
+# Seconds before an insert by another worker process shows here (this
+# process's own inserts show at once, see ResponseCache.expire)
+VERSION_TTL = float(os.getenv("RESPONSE_CACHE_VERSION_TTL", "1"))
+
+
+def bump_version(db):
+    '''
+        In the caller's write transaction: every cached response and ETag
+        is stale once it commits, in every server process
+    '''
+    db.execute(update(DataVersion).where(DataVersion.id == 1).values(version=DataVersion.version + 1))
+
+
+def read_version(db):
+    '''
+        (token, counter)
+    '''
+    return tuple(db.execute(
+        select(DataVersion.token, DataVersion.version).where(DataVersion.id == 1)
+    ).one())
+
+
+def is_newer(version, than):
+    '''
+        A new token means another database file: newer as well
+    '''
+    return than is None or version[0] != than[0] or version[1] > than[1]
+
+
+class ResponseCache:
+    '''
+    Pre-serialized responses of the read endpoints, keyed on the query and
+    the data version.
+
+    The version lives in the database (data_version, moved by bump_version()
+    in the transaction that inserts), so with several uvicorn workers each
+    one sees another's inserts. It is kept in memory and read again at most
+    every `ttl` seconds, or right after this process inserted (expire()), so
+    polls don't touch the database. An entry is valid exactly as long as its
+    version is current, nothing is invalidated by hand. The ETag is derived
+    from (version, query) alone: a poll with a matching If-None-Match gets
+    304 without running the endpoint or looking at the cache.
+    '''
+
+    def __init__(self, load_version, max_bytes=MAX_BYTES, ttl=VERSION_TTL):
+        self.load_version = load_version  # () -> (token, counter), blocking
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._version = None
+        self._loaded_at = 0.0  # time.monotonic() of the last load
+        self._entries = OrderedDict()
+        self._entries_version = None
+        self._size = 0
+
+    def expire(self):
+        '''
+            This process committed new rows: read the version again on the
+            next request instead of waiting out the TTL
+        '''
+        self._loaded_at = 0.0
+
+    async def version(self):
+        if self._version is None or time.monotonic() - self._loaded_at >= self.ttl:
+            self._loaded_at = time.monotonic()
+            version = await run_in_threadpool(self.load_version)
+            # a slower load that started earlier never moves it back
+            if is_newer(version, self._version):
+                self._version = version
+        return self._version
+
+    def clear(self):
+        self._entries.clear()
+        self._size = 0
+
+    def etag(self, key, version):
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=8).hexdigest()
+        # weak: the gzip and plain bodies share it
+        return f'W/"{version[0]}.{version[1]}-{digest}"'
+
+    def _get(self, key, version):
+        if self._entries_version is None or is_newer(version, self._entries_version):
+            # older versions can never be served again
+            self.clear()
+            self._entries_version = version
+        elif version != self._entries_version:
+            # a request still on an older version: no hit, and no flush of
+            # what newer requests already stored
+            return None
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _put(self, key, version, entry):
+        if self._entries_version != version or self.max_bytes <= 0:
+            return
+        size = len(entry["body"]) + len(entry["gzip"] or b"")
+        if size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self._size += size
+        while self._size > self.max_bytes:
+            _, old = self._entries.popitem(last=False)
+            self._size -= len(old["body"]) + len(old["gzip"] or b"")
+
+    async def __call__(self, request, call_next):
+        '''
+            HTTP middleware (register it inside CORS, so hits get CORS headers)
+        '''
+        if request.method != "GET" or request.url.path not in CACHED_PATHS:
+            return await call_next(request)
+
+        # taken before the query runs: a commit landing meanwhile bumps it
+        # again, so nothing newer is ever stored under an older version
+        version = await self.version()
+        key = (request.url.path, tuple(sorted(request.query_params.multi_items())))
+        etag = self.etag(key, version)
+        use_gzip = "gzip" in request.headers.get("accept-encoding", "")
+
+        if etag in request.headers.get("if-none-match", ""):
+            self._count("not_modified")
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+        entry = self._get(key, version)
+        if entry is None:
+            response = await call_next(request)
+            if response.status_code != 200:
+                return response
+            body = b"".join([chunk async for chunk in response.body_iterator])
+            entry = {
+                "body": body,
+                "gzip": gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_SIZE else None,
+                "media_type": response.headers.get("content-type"),
+            }
+            self._put(key, version, entry)
+            self._count("miss")
+        else:
+            self._count("hit")
+
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if use_gzip and entry["gzip"] is not None:
+            headers["Content-Encoding"] = "gzip"
+            return Response(entry["gzip"], headers=headers, media_type=entry["media_type"])
+        return Response(entry["body"], headers=headers, media_type=entry["media_type"])
+
+    def _count(self, result):
+        if metrics.ENABLED:
+            metrics.response_cache.labels(result).inc()
+
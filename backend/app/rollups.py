@@ -0,0 +1,107 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+import math
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .models import ArticleCoin, SentimentRollup
+
+RESOLUTIONS = {
+    "5m": timedelta(minutes=5),
+    "1h": timedelta(hours=1),
+    "1d": timedelta(days=1),
+}
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_utc_naive(value):
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def bucket_start(value, resolution):
+    '''
+        Start of the `resolution` bucket holding `value`, naive UTC
+    '''
+    value = to_utc_naive(value)
+    size = RESOLUTIONS[resolution]
+    return EPOCH + ((value - EPOCH) // size) * size
+
+
+def aggregate(rows):
+    '''
+        News rows (dicts) -> {(resolution, ticker, bucket): [count, sum, sumsq]}
+    '''
+    totals = defaultdict(lambda: [0, 0.0, 0.0])
+    for row in rows:
+        if row["published_at"] is None or row["sentiment_score"] is None:
+            continue
+        score = row["sentiment_score"]
+        for resolution in RESOLUTIONS:
+            total = totals[(resolution, row["coin_ticker"], bucket_start(row["published_at"], resolution))]
+            total[0] += 1
+            total[1] += score
+            total[2] += score * score
+    return totals
+
+
+def apply_rollups(db, rows):
+    '''
+        Add freshly inserted news rows to their buckets, one upsert per
+        touched bucket, in the caller's transaction
+    '''
+    totals = aggregate(rows)
+    if not totals:
+        return
+    statement = sqlite_insert(SentimentRollup.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=["resolution", "coin_ticker", "bucket"],
+        set_={
+            "count": SentimentRollup.count + statement.excluded["count"],
+            "score_sum": SentimentRollup.score_sum + statement.excluded["score_sum"],
+            "score_sumsq": SentimentRollup.score_sumsq + statement.excluded["score_sumsq"],
+        },
+    )
+    db.execute(statement, [
+        {
+            "resolution": resolution, "coin_ticker": ticker, "bucket": bucket,
+            "count": count, "score_sum": score_sum, "score_sumsq": score_sumsq,
+        }
+        for (resolution, ticker, bucket), (count, score_sum, score_sumsq) in totals.items()
+    ])
+
+
+def rebuild_rollups(db, batch_size=5000):
+    '''
+        Recompute every bucket from the news table (old news.db files, repairs)
+    '''
+    db.query(SentimentRollup).delete()
+    columns = select(ArticleCoin.coin_ticker, ArticleCoin.published_at, ArticleCoin.sentiment_score)
+    result = db.execute(columns.execution_options(yield_per=batch_size))
+    for batch in result.mappings().partitions():
+        apply_rollups(db, batch)
+
+
+def timeseries_select(resolution, tickers=None, since=None, until=None):
+    statement = select(SentimentRollup).where(SentimentRollup.resolution == resolution)
+    if tickers:
+        statement = statement.where(SentimentRollup.coin_ticker.in_(tickers))
+    if since is not None:
+        statement = statement.where(SentimentRollup.bucket >= bucket_start(since, resolution))
+    if until is not None:
+        statement = statement.where(SentimentRollup.bucket < to_utc_naive(until))
+    return statement.order_by(SentimentRollup.coin_ticker, SentimentRollup.bucket)
+
+
+def serialize(rollup):
+    mean = rollup.score_sum / rollup.count
+    variance = max(0.0, rollup.score_sumsq / rollup.count - mean * mean)
+    return {
+        "ticker": rollup.coin_ticker,
+        "bucket": rollup.bucket.isoformat(),
+        "count": rollup.count,
+        "mean": mean,
+        "stddev": math.sqrt(variance),
+    }
@@ -0,0 +1,72 @@
+import asyncio
+from contextlib import suppress
+
+
+class IngestScheduler:
+    '''
+    Runs an async ingest job every `interval` seconds (in the app lifespan).
+
+    Only one run at a time: runs are serialized by a lock, and refresh()
+    calls that arrive while a run is in progress join that run and get its
+    result instead of starting another one.
+    '''
+
+    def __init__(self, job, interval):
+        self.job = job
+        self.interval = interval
+        self._lock = asyncio.Lock()
+        self._current = None
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        '''
+            Stops the loop, then waits for the run in progress: it is shielded
+            from the cancel and may still be writing
+        '''
+        if self._task is None:
+            return
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+        if self._current is not None:
+            with suppress(Exception):
+                await self._current
+
+    @property
+    def running(self):
+        return self._current is not None
+
+    async def refresh(self):
+        '''
+            Run the job now, or wait for the run already in progress
+        '''
+        if self._current is None:
+            current = asyncio.ensure_future(self._run())
+            self._current = current
+
+            def clear(_):
+                if self._current is current:
+                    self._current = None
+            current.add_done_callback(clear)
+
+        # a caller going away (client disconnect) must not cancel the shared run
+        return await asyncio.shield(self._current)
+
+    async def _run(self):
+        async with self._lock:
+            return await self.job()
+
+    async def _loop(self):
+        # First run right away, then one per interval; interval <= 0 -> startup only
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print("[SCHEDULER] Ingest run failed:", e)
+            if self.interval <= 0:
+                return
+            await asyncio.sleep(self.interval)
@@ -1,48 +1,80 @@
-from .stringmatching.aho_corasick import AhoCorasick
-from .stringmatching.fuzzy import FuzzyMatcher
-
-keywords = {
-    "positive": 
-    [
-        "bullish", "pump", "surge", "rally", "moon", "breakout", "ath", "all time high", "whale pumped", "support held", "uptrend", "rebound", "bounce", "recovery", "accumulation", "god candle", "parabolic", "demand zone", "double bottom", "consolidation", "higher low", "partnership", "listing", "airdrop", "upgrade", "adoption", "integration", "favor", "approval", "gains", "sparks", "increase", "extending", "inflow", "boost", "anticipated", "bull run", "green candle", "break resistance", "trend reversal", "ETF approved", "record high", "buy pressure", "new listing",
-    ],
-
-    "negative": 
-    [
-        "crash", "dump", "bearish", "rugpull", "decline", "bear market", "whale dumped", "resistance failed", "exit liquidity", "bleed", "correction", "plunge", "pampedak", "downtrend", "down", "fud", "doubt", "fear", "uncertainty", "war", "loss", "bleeds", "attack", "hacked", "fake", "decrease", "scam", "pressure", "liquidated", "market turmoil", "flash crash", "exploit", "lawsuit", "under investigation", "sell pressure",
-    ]
-}
-
-matcher = AhoCorasick(keywords["positive"] + keywords["negative"])
-fuzzy = FuzzyMatcher()
-
-def analyze_sentiment(text):
-    text_lower = text.lower()
-    aho_result = matcher.search_words(text_lower)
+from .stringmatching.document import Document
+from . import lexicon, metrics
+
+# Keywords live in data/lexicon.json; the matchers compiled from them (one
+# automaton for coins + sentiment, the fuzzy index) hang off the current
+# lexicon.Lexicon and are swapped as a whole when the file changes
+
+def analyze_article(text, lex=None):
+    '''
+        Coin detection + sentiment from a single scan of the text
+    '''
+    lex = lex or lexicon.current()
+    doc = Document.of(text)
+    found = exact_pass(doc, lex)
+    return {
+        "coins": sorted(found["coins"]),
+        "sentiment": score_sentiment(doc, found["positive"], found["negative"], lex),
+    }
 
-    pos_keywords_found = set()
-    neg_keywords_found = set()
+def analyze_sentiment(text, lex=None):
+    lex = lex or lexicon.current()
+    doc = Document.of(text)
+    found = exact_pass(doc, lex)
+    return score_sentiment(doc, found["positive"], found["negative"], lex)
+
+def analyze_article_batch(texts, lex=None):
+    '''
+        analyze_article over many texts, in order, all on one lexicon version
+    '''
+    lex = lex or lexicon.current()
+    return [analyze_article(text, lex) for text in texts]
+
+def analyze_sentiment_batch(texts, lex=None):
+    '''
+        analyze_sentiment over many texts, in order, all on one lexicon version
+    '''
+    lex = lex or lexicon.current()
+    return [analyze_sentiment(text, lex) for text in texts]
+
+@metrics.timed("exact_match")
+def exact_pass(doc, lex):
+    '''
+        Coins + exact sentiment keywords, one automaton scan (so the
+        exact_match stage includes coin detection)
+    '''
+    found = lex.matcher.scan(doc)
+    if metrics.ENABLED:
+        metrics.keyword_matches.labels("exact").inc(len(found["positive"]) + len(found["negative"]))
+    return found
+
+@metrics.timed("fuzzy_match")
+def fuzzy_pass(doc, lex):
+    found = lex.fuzzy_index.search(doc)
+    if metrics.ENABLED:
+        metrics.keyword_matches.labels("fuzzy").inc(len(found))
+    return found
+
+def score_sentiment(doc, pos_exact, neg_exact, lex=None):
+    '''
+        Fills in fuzzy hits for keywords the exact pass missed, then scores.
+        `doc` is the Document the exact pass already tokenized
+    '''
+    lex = lex or lexicon.current()
 
     # EXACT
-    for kw in keywords["positive"]:
-        if kw in aho_result:
-            pos_keywords_found.add(kw)
-    for kw in keywords["negative"]:
-        if kw in aho_result:
-            neg_keywords_found.add(kw)
+    pos_keywords_found = set(pos_exact)
+    neg_keywords_found = set(neg_exact)
 
-    # FUZZY (If exact not found)
-    for kw in keywords["positive"]:
-        if kw not in pos_keywords_found:
-            count, _ = fuzzy.fuzzy_search(kw, text_lower)
-            if count > 0:
-                pos_keywords_found.add(kw)
+    # FUZZY (If exact not found), every n-gram looked up once in the index
+    fuzzy_found = fuzzy_pass(doc, lex)
+    for kw in lex.keywords["positive"]:
+        if kw in fuzzy_found:
+            pos_keywords_found.add(kw)
 
-    for kw in keywords["negative"]:
-        if kw not in neg_keywords_found:
-            count, _ = fuzzy.fuzzy_search(kw, text_lower)
-            if count > 0:
-                neg_keywords_found.add(kw)
+    for kw in lex.keywords["negative"]:
+        if kw in fuzzy_found:
+            neg_keywords_found.add(kw)
 
     pos_count = len(pos_keywords_found)
     neg_count = len(neg_keywords_found)
@@ -59,8 +91,8 @@ def analyze_sentiment(text):
     return {
         "score": round(score, 2),
         "sentiment": label,
-        "positive": {"count": pos_count, "keywords": list(pos_keywords_found)},
-        "negative": {"count": neg_count, "keywords": list(neg_keywords_found)},
+        "positive": {"count": pos_count, "keywords": sorted(pos_keywords_found)},
+        "negative": {"count": neg_count, "keywords": sorted(neg_keywords_found)},
     }
 
 
@@ -1,33 +1,45 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, APIRouter
+from fastapi import FastAPI, File, UploadFile, HTTPException, APIRouter, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
 
 from contextlib import asynccontextmanager
-from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
 
+from sqlalchemy import case, func
+from sqlalchemy.exc import TimeoutError as PoolTimeout
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from fastapi import Depends
-from datetime import datetime
+from datetime import datetime, timezone
 from dateutil import parser
+from typing import List, Optional
+import json
 
-from .database import SessionLocal, engine
-from .sentiment_analysis import analyze_sentiment
-from .coins import identify_coins_in_text, COIN_KEYWORDS
+from .database import IN_CHUNK_SIZE, STORAGE_MODE, ExportSessionLocal, ReadSessionLocal, SessionLocal, engine
+from .pipeline import shutdown_pool
+from .analysis_cache import analysis_cache
+from .response_cache import ResponseCache, bump_version, read_version
+from .broadcast import HEARTBEAT, broadcaster
+from . import lexicon
 
 
-from .models import Base, News
+from .models import Article, ArticleCoin, News, IngestState, SentimentRollup
+from .migrations import create_schema
+from .fetcher import CryptoPanicFetcher
+from .scheduler import IngestScheduler
+from .writer import DbWriter
+from . import metrics, queries, rollups
 
-import requests
+import asyncio
 import os
 
-load_dotenv()
-
 API_KEY = os.getenv("CRYPTO_PANIC_API_KEY")
 BASE_URL = os.getenv("CRYPTO_PANIC_BASE_URL")
 print("[KEY] API_KEY =", API_KEY)
 print("[BASE_URL] BASE_URL =", BASE_URL)
 
-# coin_list = ",".join(COIN_KEYWORDS.keys())
+# coin_list = ",".join(lexicon.current().coins.keys())
 params = {
     "auth_token": API_KEY,
     # "public": True,
@@ -38,28 +50,67 @@ params = {
     # "size": 100
 }
 
+# Pages followed per fetch (concurrently after the first one)
+FETCH_MAX_PAGES = int(os.getenv("CRYPTO_PANIC_MAX_PAGES", "1"))
+FETCH_CONCURRENCY = int(os.getenv("CRYPTO_PANIC_CONCURRENCY", "4"))
+
+fetcher = None
+
+def get_fetcher():
+    global fetcher
+    if fetcher is None:
+        fetcher = CryptoPanicFetcher(
+            BASE_URL, params, max_pages=FETCH_MAX_PAGES, concurrency=FETCH_CONCURRENCY
+        )
+    return fetcher
+
+
+# Seconds between background polls, <= 0 -> only ingest once at startup
+INGEST_INTERVAL = float(os.getenv("INGEST_INTERVAL_SECONDS", "300"))
+
+
+async def run_ingest():
+    news_items = await fetch_crypto_news()
+    # matching + DB write are blocking, keep them off the event loop
+    return await run_in_threadpool(ingest_new_news, news_items)
+
+scheduler = IngestScheduler(run_ingest, INGEST_INTERVAL)
+# STORAGE_MODE=wal: the only connection that writes (started in the lifespan)
+writer = DbWriter(engine)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup logic
-    db = SessionLocal()
-    try:
-        news_items = fetch_crypto_news()
-        insert_news_to_db(news_items, db)
-    except Exception as e:
-        print("[LIFESPAN] Failed to fetch/insert news:", e)
-    finally:
-        db.close()
+    # Startup logic: ingest in the background, serving does not wait on CryptoPanic
+    if STORAGE_MODE == "wal":
+        writer.start()
+    scheduler.start()
+    # Edits to data/lexicon.json are compiled off-process and swapped in
+    lexicon_watch = asyncio.create_task(lexicon.watch())
     
     yield  # App runs here
 
-    # Optional: teardown logic if needed
+    lexicon_watch.cancel()
+    lexicon.shutdown_compile_pool()
+    await scheduler.stop()
+    # after the scheduler: its last run may still be queueing writes
+    await run_in_threadpool(writer.stop)
+    if fetcher is not None:
+        await fetcher.aclose()
+    shutdown_pool()
 
 
 
 app = FastAPI(lifespan=lifespan)
 router = APIRouter()
 
+def load_data_version():
+    with ReadSessionLocal() as db:
+        return read_version(db)
+
+response_cache = ResponseCache(load_data_version)
+# Added first = runs inside CORS, so cached responses get the CORS headers too
+app.middleware("http")(response_cache)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],
@@ -70,7 +121,8 @@ app.add_middleware(
 
 # ================= DB =================
 def get_db():
-    db = SessionLocal()
+    # read endpoints only; in WAL mode they never wait on the ingest
+    db = ReadSessionLocal()
     try:
         yield db
     finally:
@@ -78,73 +130,521 @@ def get_db():
 
 
 # GET
+NEWS_PAGE_MAX = 1000
+EXPORT_BATCH_SIZE = 1000
+
 @app.get("/api/news")
-def read_news(db: Session = Depends(get_db)):
-    news_items = db.query(News).all()
+def read_news(
+    limit: int = Query(100, ge=1, le=NEWS_PAGE_MAX),
+    cursor: Optional[str] = None,
+    ticker: Optional[List[str]] = Query(None),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    min_abs_score: Optional[float] = Query(None, ge=0),
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    '''
+        Newest first, one page at a time. Pass `next_cursor` back as `cursor`
+        for the next page (keyset on published_at, id, so deep pages cost the
+        same as the first one)
+    '''
+    try:
+        columns = queries.parse_fields(fields)
+        statement = queries.news_select(
+            columns, queries.parse_tickers(ticker), since, until, min_abs_score
+        )
+        if cursor:
+            statement = queries.after_cursor(statement, cursor)
+    except queries.QueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # one extra row tells whether there is a next page
+    rows = db.execute(statement.limit(limit + 1)).mappings().all()
+    page = rows[:limit]
     return {
-        "news": [item.__dict__ for item in news_items]
+        "news": [queries.serialize(row, columns) for row in page],
+        "next_cursor": queries.encode_cursor(page[-1]) if len(rows) > limit else None,
     }
 
+@app.get("/api/articles")
+def read_articles(
+    limit: int = Query(100, ge=1, le=NEWS_PAGE_MAX),
+    cursor: Optional[str] = None,
+    ticker: Optional[List[str]] = Query(None),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+):
+    '''
+        Like /api/news but one item per article with a `coins` list, so the
+        text is sent once instead of once per coin
+    '''
+    try:
+        statement = queries.articles_select(queries.parse_tickers(ticker), since, until)
+        if cursor:
+            statement = queries.after_article_cursor(statement, cursor)
+    except queries.QueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    rows = db.execute(statement.limit(limit + 1)).mappings().all()
+    page = rows[:limit]
+    return {
+        "articles": [queries.serialize_article(row) for row in page],
+        "next_cursor": queries.encode_article_cursor(page[-1]) if len(rows) > limit else None,
+    }
+
+@app.get("/api/news/search")
+def search_news(
+    q: str,
+    limit: int = Query(20, ge=1, le=NEWS_PAGE_MAX),
+    cursor: Optional[str] = None,
+    order: str = "rank",
+    ticker: Optional[List[str]] = Query(None),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+):
+    '''
+        Full-text search over title + description (FTS5): `q` words must all
+        match, "quoted phrases" match as a phrase, word* is a prefix.
+        order=rank (bm25, best first) or recent; pages like /api/articles
+    '''
+    try:
+        statement = queries.search_select(q, queries.parse_tickers(ticker), since, until, order)
+        if cursor:
+            statement = queries.after_search_cursor(statement, cursor, order)
+    except queries.QueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    rows = db.execute(queries.search_page(statement, limit + 1, order)).mappings().all()
+    page = rows[:limit]
+    return {
+        "articles": [queries.serialize_search(row) for row in page],
+        "next_cursor": queries.encode_search_cursor(page[-1]) if len(rows) > limit else None,
+    }
+
+@app.get("/api/news/export")
+def export_news(
+    ticker: Optional[List[str]] = Query(None),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    min_abs_score: Optional[float] = Query(None, ge=0),
+    fields: Optional[str] = None,
+):
+    '''
+        Every matching row as NDJSON, streamed from a server-side cursor so
+        memory stays flat whatever the table size
+    '''
+    try:
+        columns = queries.parse_fields(fields)
+        statement = queries.news_select(
+            columns, queries.parse_tickers(ticker), since, until, min_abs_score
+        )
+    except queries.QueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Own session from the export pool: held until the download ends, and
+    # taken now so a full pool is a 503 instead of a stream cut short
+    db = ExportSessionLocal()
+    try:
+        db.connection()
+    except PoolTimeout:
+        db.close()
+        raise HTTPException(status_code=503, detail="Too many exports running, retry later")
+
+    def rows():
+        try:
+            result = db.execute(statement.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE))
+            for batch in result.mappings().partitions():
+                yield "".join(json.dumps(queries.serialize(row, columns)) + "\n" for row in batch)
+        finally:
+            db.close()
+
+    # close() again afterwards: covers a client gone before the first chunk
+    return StreamingResponse(rows(), media_type="application/x-ndjson", background=BackgroundTask(db.close))
+
+@app.get("/api/sentiment/summary")
+def read_sentiment_summary(db: Session = Depends(get_db)):
+    '''
+        Per-ticker count / mean / min / max score, bullish / bearish counts
+        and latest article, grouped in SQL so the payload is one row per coin
+        however big the table gets
+    '''
+    return {"coins": summary_rows(db)}
+
+# Same cut-off as the dashboard's Bullish / Bearish labels
+SIGNAL_THRESHOLD = 0.1
+
+def summary_rows(db, tickers=None):
+    # article_coins, not the view: the per-ticker index holds every column
+    score = ArticleCoin.sentiment_score
+    query = db.query(
+        ArticleCoin.coin_ticker,
+        func.count(),
+        func.avg(score),
+        func.min(score),
+        func.max(score),
+        func.max(ArticleCoin.published_at),
+        func.sum(case((score > SIGNAL_THRESHOLD, 1), else_=0)),
+        func.sum(case((score < -SIGNAL_THRESHOLD, 1), else_=0)),
+    )
+    if tickers:
+        query = query.filter(ArticleCoin.coin_ticker.in_(tickers))
+    return [
+        {
+            "ticker": ticker,
+            "count": count,
+            "mean": mean,
+            "min": min_score,
+            "max": max_score,
+            "latest": latest,
+            "bullish": bullish,
+            "bearish": bearish,
+        }
+        for ticker, count, mean, min_score, max_score, latest, bullish, bearish in query.group_by(ArticleCoin.coin_ticker).all()
+    ]
+
+@app.get("/api/sentiment/timeseries")
+def read_sentiment_timeseries(
+    resolution: str = "1h",
+    ticker: Optional[List[str]] = Query(None),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+):
+    '''
+        Per-ticker count / mean / stddev of the score per time bucket, read
+        from the rollup table only (cost grows with buckets, not articles)
+    '''
+    if resolution not in rollups.RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"resolution must be one of {', '.join(rollups.RESOLUTIONS)}")
+    statement = rollups.timeseries_select(resolution, queries.parse_tickers(ticker), since, until)
+    return {
+        "resolution": resolution,
+        "series": [rollups.serialize(rollup) for rollup in db.scalars(statement)],
+    }
+
+# ================= Push =================
+@app.get("/api/stream")
+async def stream_news(request: Request):
+    '''
+        Server-Sent Events: one `news` event per ingest commit that added
+        articles ({"articles": [...], "coins": [...]}, the shapes of
+        /api/articles and /api/sentiment/summary). `reset` means events were
+        missed: refetch, then keep listening. Reconnects resume from
+        Last-Event-ID while it is still in the history
+    '''
+    last_event_id = request.headers.get("last-event-id")
+
+    async def events():
+        with broadcaster.subscribe(last_event_id) as subscriber:
+            yield b"retry: 5000\n\n"
+            while True:
+                event = await subscriber.get(HEARTBEAT)
+                # comment line keeps proxies from closing an idle stream
+                yield event.sse if event is not None else b": ping\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
+@app.websocket("/api/ws")
+async def news_socket(websocket: WebSocket):
+    '''
+        Same events as /api/stream, as {"id", "event", "data"} JSON messages
+        (?last_event_id= to resume)
+    '''
+    # subscribed before the handshake completes, nothing published after it is missed
+    with broadcaster.subscribe(websocket.query_params.get("last_event_id")) as subscriber:
+        await websocket.accept()
+        try:
+            while True:
+                event = await subscriber.get(HEARTBEAT)
+                await websocket.send_text(event.message if event is not None else '{"event": "ping"}')
+        except WebSocketDisconnect:
+            pass
+
 # ================= Fetch API =================
-def fetch_crypto_news():
+@metrics.timed("fetch")
+async def fetch_crypto_news():
     try:
-        response = requests.get(BASE_URL, params=params)
-        response.raise_for_status()
-        data = response.json()
-        return data.get("results", [])
+        return await get_fetcher().fetch()
     except Exception as e:
+        metrics.fetch_errors.inc()
         print("[DEBUG] Error fetching news:", e)
         raise HTTPException(status_code=500, detail="Failed to fetch news from CryptoPanic")
 
 # ================= Insert fetched news to DB =================
-def insert_news_to_db(news_list, db):
-    # Limit 100 news (latest)
-    news_list = news_list[:100] 
+@metrics.timed("insert")
+def insert_news_to_db(news_list, db, limit=100):
+    # Limit 100 news (latest) by default, limit=None for a full backfill
+    if limit is not None:
+        news_list = news_list[:limit]
+    plan = plan_insert(news_list, db)
+    announce(db, plan["rows"], write_insert(db, plan))
+    return {"[RESULTS] inserted": len(news_list)}
 
+def plan_insert(news_list, db):
+    '''
+        Read-only half of the insert: articles not stored yet, their
+        analyses and the news rows to write
+    '''
+    # ! Skip jika sudah ada fieldnya di db (one IN query, not one per article)
+    seen = existing_news_ids(db, [news.get("id") for news in news_list])
+    pending = []
     for news in news_list:
-
-        # ! Skip jika sudah ada fieldnya di db
-        if db.query(News).filter(News.id == news.get("id")).first():
+        if news.get("id") in seen:
             continue
+        seen.add(news.get("id"))
+        pending.append(news)
 
-        # print("Inserting:", news)
-        text = (news.get("title") or "") + " " + (news.get("description") or "")
+    # Coins + sentiment for the whole batch: cached by content hash, the rest
+    # matched in a process pool when it is big
+    texts = [(news.get("title") or "") + " " + (news.get("description") or "") for news in pending]
+    analyses, computed = analysis_cache.lookup(texts, db)
 
-        mentioned_coins = identify_coins_in_text(text)
+    rows = []
+    for news, analysis in zip(pending, analyses):
+        mentioned_coins = analysis["coins"]
 
         if not mentioned_coins:
             continue
 
-        sentiment = analyze_sentiment(text)
-        score = sentiment["score"]
+        score = analysis["sentiment"]["score"]
+        published_at = parser.parse(news.get("published_at")) if news.get("published_at") else None
 
         for coin in mentioned_coins:
-            news_item = News(
-                id=news.get("id"),
-                title=news.get("title"),
-                description=news.get("description"),
-                coin_ticker = coin,
-                published_at=parser.parse(news.get("published_at")) if news.get("published_at") else None,
-                sentiment_score=score
-            )
-            db.add(news_item)
+            rows.append({
+                "id": news.get("id"),
+                "title": news.get("title"),
+                "description": news.get("description"),
+                "coin_ticker": coin,
+                "published_at": published_at,
+                "sentiment_score": score,
+            })
+    return {"pending": pending, "analyses": analyses, "computed": computed, "rows": rows}
+
+def write_insert(db, plan):
+    '''
+        Write half: new analysis cache entries, news rows, rollups, one commit
+    '''
+    if plan["computed"]:
+        analysis_cache.store(db, plan["computed"])
     try:
-        db.commit()
+        inserted = write_news_rows(db, plan["rows"])
     except Exception as e:
         print("[DEBUG] DB commit error:", e)
         raise HTTPException(status_code=500, detail="DB insert failed")
-    
-    return {"[RESULTS] inserted": len(news_list)}
+
+    if metrics.ENABLED:
+        metrics.articles_processed.inc(len(plan["pending"]))
+        metrics.coin_matches.inc(sum(len(analysis["coins"]) for analysis in plan["analyses"]))
+        metrics.db_rows.inc(len(inserted))
+    return inserted
+
+
+def announce(db, rows, inserted):
+    '''
+        After a commit that added rows: fresh response cache version, and
+        one stream event with the new articles plus the current aggregates
+        of the coins they touched (absolute values, so a client that
+        resyncs never counts anything twice)
+    '''
+    if not inserted:
+        return
+    response_cache.expire()
+    if not broadcaster.listening:
+        return
+
+    articles = {}
+    for row in rows:
+        if (row["id"], row["coin_ticker"]) not in inserted:
+            continue
+        article = articles.get(row["id"])
+        if article is None:
+            published_at = row["published_at"]
+            article = articles[row["id"]] = {
+                "id": row["id"],
+                "title": row["title"],
+                "description": row["description"],
+                "coins": [],
+                "published_at": rollups.to_utc_naive(published_at).isoformat() if published_at else None,
+                "sentiment_score": row["sentiment_score"],
+            }
+        article["coins"].append(row["coin_ticker"])
+    for article in articles.values():
+        article["coins"].sort()
+
+    tickers = sorted({ticker for _, ticker in inserted})
+    coins = [
+        dict(coin, latest=coin["latest"].isoformat() if coin["latest"] else None)
+        for coin in summary_rows(db, tickers)
+    ]
+    broadcaster.publish_threadsafe("news", {"articles": list(articles.values()), "coins": coins})
+
+
+# ================= Incremental ingest =================
+INGEST_SOURCE = "cryptopanic"
+
+def news_key(news):
+    '''
+        (published_at, id) of a fetched article, comparable with the stored
+        watermark (SQLite keeps DateTime without timezone)
+    '''
+    published_at = parser.parse(news["published_at"]) if news.get("published_at") else None
+    if published_at is not None and published_at.tzinfo is not None:
+        published_at = published_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return (published_at, news.get("id") or 0)
+
+@metrics.timed("insert")
+def ingest_new_news(news_list, db=None):
+    '''
+        Analyze + insert only the articles newer than the stored high-watermark,
+        then move the watermark to the newest one seen. Without `db` and with
+        the writer running, reads and matching use a read session and the
+        writes are one writer job
+    '''
+    use_writer = db is None and writer.running
+    own_session = db is None
+    if own_session:
+        db = ReadSessionLocal() if use_writer else SessionLocal()
+    try:
+        state = db.get(IngestState, INGEST_SOURCE)
+        watermark = (state.published_at, state.last_id or 0) if state and state.published_at else None
+
+        newer = []
+        newest = watermark
+        for news in news_list:
+            key = news_key(news)
+            if key[0] is None:
+                # no date, cannot be ordered -> the existence check decides
+                newer.append(news)
+                continue
+            if watermark is None or key > watermark:
+                newer.append(news)
+                if newest is None or key > newest:
+                    newest = key
+
+        plan = plan_insert(newer, db)
+        if use_writer:
+            # end the read transaction before waiting on the writer
+            db.close()
+            inserted = writer.run(write_ingest, plan, newest)
+        else:
+            inserted = write_ingest(db, plan, newest)
+        # after the commit (the writer's batch commit included)
+        announce(db, plan["rows"], inserted)
+        return {"[RESULTS] inserted": len(newer), "skipped": len(news_list) - len(newer)}
+    finally:
+        if own_session:
+            db.close()
+
+def write_ingest(db, plan, newest):
+    '''
+        The rows of `plan`, then the watermark (only ever moved forward).
+        Returns the inserted (id, coin_ticker) keys
+    '''
+    inserted = write_insert(db, plan)
+
+    # Saved after the insert commit: a crash in between only means the same
+    # few articles are seen again, and the insert skips stored ids anyway
+    if newest is None:
+        return inserted
+    state = db.get(IngestState, INGEST_SOURCE) or IngestState(source=INGEST_SOURCE)
+    if state.published_at is None or newest > (state.published_at, state.last_id or 0):
+        state.published_at, state.last_id = newest
+        db.merge(state)
+        db.commit()
+    return inserted
+
+
+@metrics.timed("db_write")
+def write_news_rows(db, rows):
+    '''
+        Insert + rollups + commit, one transaction
+    '''
+    inserted = bulk_insert_news(db, rows)
+    # time buckets move in the same transaction, only for rows really added
+    rollups.apply_rollups(db, [row for row in rows if (row["id"], row["coin_ticker"]) in inserted])
+    if inserted:
+        bump_version(db)
+    db.commit()
+    return inserted
+
+
+def existing_news_ids(db, ids):
+    '''
+        Which of `ids` are already stored, in one query per 900 ids
+    '''
+    ids = list({news_id for news_id in ids if news_id is not None})
+    found = set()
+    for i in range(0, len(ids), IN_CHUNK_SIZE):
+        chunk = ids[i:i + IN_CHUNK_SIZE]
+        found.update(row[0] for row in db.query(Article.id).filter(Article.id.in_(chunk)))
+    return found
+
+def bulk_insert_news(db, rows):
+    '''
+        News rows (one per article + coin) -> one articles row per article and
+        one article_coins row per coin; pairs already stored are skipped.
+        Returns the (id, coin_ticker) keys actually inserted
+    '''
+    if not rows:
+        return set()
+    articles = {}
+    for row in rows:
+        articles.setdefault(row["id"], {
+            "id": row["id"],
+            "title": row["title"],
+            "description": row["description"],
+            "published_at": row["published_at"],
+            "sentiment_score": row["sentiment_score"],
+        })
+    db.execute(
+        sqlite_insert(Article.__table__).on_conflict_do_nothing(index_elements=["id"]),
+        list(articles.values()),
+    )
+    statement = sqlite_insert(ArticleCoin.__table__).on_conflict_do_nothing(
+        index_elements=["article_id", "coin_ticker"]
+    ).returning(ArticleCoin.article_id, ArticleCoin.coin_ticker)
+    pairs = [
+        {
+            "article_id": row["id"],
+            "coin_ticker": row["coin_ticker"],
+            "published_at": articles[row["id"]]["published_at"],
+            "sentiment_score": articles[row["id"]]["sentiment_score"],
+        }
+        for row in rows
+    ]
+    return {tuple(row) for row in db.execute(statement, pairs)}
+
+
+@app.get("/metrics")
+def read_metrics():
+    '''
+        Stage latencies and counters for Prometheus (METRICS_ENABLED=false -> 404)
+    '''
+    if not metrics.ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 
 # POST 
 @router.post("/api/refresh-news")
-def refresh_news(db: Session = Depends(get_db)):
-    news_items = fetch_crypto_news()
-    result = insert_news_to_db(news_items, db)
+async def refresh_news():
+    # Joins the scheduler run if one is already in progress
+    result = await scheduler.refresh()
     return {"message": "News refreshed", **result}
 
 
 # ================= Table Init =================
-Base.metadata.create_all(bind=engine)
+# Also moves an old news table into articles + article_coins
+create_schema(engine)
+# news.db from before the rollup table: fill the buckets once
+with SessionLocal() as init_db:
+    if init_db.query(SentimentRollup).first() is None and init_db.query(News).first() is not None:
+        rollups.rebuild_rollups(init_db)
+        init_db.commit()
 app.include_router(router)
\ No newline at end of file
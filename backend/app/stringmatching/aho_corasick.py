@@ -1,16 +1,35 @@
-from collections import defaultdict
+from array import array
+from collections import defaultdict, deque
+import json
+import mmap
+import os
 import re
+import struct
+
+# Every non-word character (space, punctuation, ...) is read as this one
+SEPARATOR = ' '
+
+
+def is_word_char(char):
+    return char.isalnum() or char == '_'
+
 
 class AhoCorasick:
 
     def char_to_index(self, char):
-        """Convert character to index, handling only lowercase letters a-z"""
-        if 'a' <= char <= 'z':
-            return ord(char) - 97  # Convert 'a'-'z' to 0-25
-        else:
-            return 0  
+        """Convert character to its alphabet index, 0 for characters no word uses"""
+        if not is_word_char(char):
+            char = SEPARATOR
+        return self.alphabet.get(char, 0)
 
-    def __init__(self, words):
+    def __init__(self, words, whole_words=False):
+        '''
+            whole_words=True only reports a word when it is not glued to other
+            letters/digits ("sol" hits "sol." but not "solution"). The check is
+            part of the automaton: every word is wrapped in separators and the
+            text is scanned as if padded with one on each side.
+        '''
+        self.whole_words = whole_words
 
         # filter alphanumeric
         self.words = []
@@ -21,20 +40,40 @@ class AhoCorasick:
                 self.words.append(cleaned_word)
         
         if not self.words:
+            self.patterns = []
+            self.alphabet = {}
+            self.max_characters = 1
             self.max_states = 1
-            self.goto = [[]]
-            self.out = [0]
+            self.goto = [[0]]
+            self.out = [[]]
             self.fail = [0]
             self.states_count = 1
             return
 
 
+        # What actually goes into the trie. Any non-word character in a word
+        # (space, dash, ...) becomes the separator
+        self.patterns = [
+            ''.join(ch if is_word_char(ch) else SEPARATOR for ch in word)
+            for word in self.words
+        ]
+        if whole_words:
+            self.patterns = [SEPARATOR + pattern + SEPARATOR for pattern in self.patterns]
+
         # Guess how many 'nodes' or 'states' we might need (sum of word lengths)
-        self.max_states = sum([len(word) for word in words])
-        self.max_characters = 26
+        self.max_states = sum([len(pattern) for pattern in self.patterns])
+
+        # Alphabet = every character used by the words (letters, digits, the
+        # separator, Unicode); index 0 is shared by everything else so it never matches
+        self.alphabet = {}
+        for pattern in self.patterns:
+            for character in pattern:
+                if character not in self.alphabet:
+                    self.alphabet[character] = len(self.alphabet) + 1
+        self.max_characters = len(self.alphabet) + 1
 
-        # Final state (if a state marks end of a complete word), use bitmask to store
-        self.out = [0]*(self.max_states+1)
+        # Final state: list of word IDs that end here (incl. via failure links)
+        self.out = [[] for _ in range(self.max_states+1)]
 
         # Failure link
         self.fail = [-1]*(self.max_states+1) 
@@ -42,7 +81,6 @@ class AhoCorasick:
         # From a state, given a character, where do we go next?
         self.goto = [[-1]*self.max_characters for _ in range(self.max_states+1)]
 
-        self.words = [word.lower() for word in words]
         self.states_count = self.build_matching()
 
 
@@ -57,7 +95,7 @@ class AhoCorasick:
 
 
         for i in range(k):
-            word = self.words[i]
+            word = self.patterns[i]
             current_state = 0
 
             for character in word:
@@ -70,7 +108,7 @@ class AhoCorasick:
                 current_state = self.goto[current_state][ch]
 
             # Flag state as end of word (word ke i ends here)
-            self.out[current_state] |= (1<<i)
+            self.out[current_state].append(i)
 
 
 
@@ -82,7 +120,7 @@ class AhoCorasick:
 
         # ========= 2. Build the failure link (fallback paths) =========
 
-        queue = [] # BFS tiap state
+        queue = deque() # BFS tiap state
         for ch in range(self.max_characters):
 
             # Liat semua yang bisa di reach dari root, set fallback ke root
@@ -92,7 +130,7 @@ class AhoCorasick:
 
         
         while queue:
-            state = queue.pop(0)
+            state = queue.popleft()
             for ch in range(self.max_characters):
                 # For each state, cari failure link dari semua children-nya
                 if self.goto[state][ch] != -1:
@@ -108,7 +146,7 @@ class AhoCorasick:
                     failure = self.goto[failure][ch]
                     self.fail[self.goto[state][ch]] = failure
 
-                    self.out[self.goto[state][ch]] |= self.out[failure]
+                    self.out[self.goto[state][ch]].extend(self.out[failure])
                     queue.append(self.goto[state][ch])
         
         return states
@@ -134,7 +172,11 @@ class AhoCorasick:
         if not self.words:
             return defaultdict(list)
 
-        text = re.sub(r'[^\w\s]', '', text.lower())
+        if self.whole_words:
+            # Pad so words at the very start/end still see a separator
+            text = SEPARATOR + text.lower() + SEPARATOR
+        else:
+            text = re.sub(r'[^\w\s]', '', text.lower())
         current_state = 0
         result = defaultdict(list)
 
@@ -142,16 +184,215 @@ class AhoCorasick:
             current_state = self.find_next_state(current_state, text[i])
 
             # Kalo curr state ga ngemark the end of any word, just keep going.
-            if self.out[current_state] == 0: 
+            if not self.out[current_state]:
                 continue
 
-            # Final state, ngecek matching
-            for j in range(len(self.words)):
-                # Check bitmask flag. (Does the flag for the j-th word exist here?)
-                if (self.out[current_state] & (1<<j)) > 0:
-                    word = self.words[j]
+            # Final state, report only the words that end here
+            for j in self.out[current_state]:
+                result[self.words[j]].append(i-len(self.patterns[j])+1)
+        return result
+
+    def compile(self):
+        '''
+            Resolve the failure links into a dense DFA (see CompiledAhoCorasick)
+        '''
+        return CompiledAhoCorasick(self)
+
+
+class _CharClasses(dict):
+    '''
+        str.translate table: character -> chr(alphabet index), 0 if unknown.
+        Non-word characters all translate to the separator's index.
+    '''
+
+    def __init__(self, separator):
+        super().__init__()
+        self.separator = chr(separator)
+
+    def __missing__(self, key):
+        self[key] = '\x00' if is_word_char(chr(key)) else self.separator
+        return self[key]
+
+
+class CompiledAhoCorasick:
+    '''
+        Dense DFA form of an AhoCorasick automaton.
+
+        Every (state, character) transition is precomputed, so scanning costs
+        exactly one lookup into a flat `array` per input character and never
+        walks failure links. States are stored premultiplied by the alphabet
+        size and renumbered so that every state with output comes last,
+        letting the scan loop test for a hit with a single comparison.
+    '''
+
+    # Artifact layout: MAGIC, header length (u32), JSON header, padding to 4
+    # bytes, then `delta` as native int32 (memory-mapped on load)
+    MAGIC = b'ACDFA1\n'
+
+    def __init__(self, automaton):
+        self.words = automaton.words
+        self.whole_words = automaton.whole_words
+        self.stride = automaton.max_characters
+        self.alphabet = automaton.alphabet
+        self.separator = automaton.alphabet.get(SEPARATOR, 0)
+
+        # match ending at i starts at i - offsets[j]; in whole_words mode the
+        # pattern carries a separator on both sides
+        trim = 2 if self.whole_words else 1
+        self.offsets = [len(pattern) - trim for pattern in automaton.patterns]
+        self.classes = self.build_classes(self.alphabet, self.separator)
+
+        states = automaton.states_count
+        goto, fail, out = automaton.goto, automaton.fail, automaton.out
+
+        # BFS order, so a state's failure target is resolved before the state
+        order = [0]
+        for state in order:
+            for ch in range(self.stride):
+                nxt = goto[state][ch]
+                if nxt > 0:
+                    order.append(nxt)
+
+        # Renumber: states without output first, then states with output
+        quiet = [state for state in order if not out[state]]
+        loud = [state for state in order if out[state]]
+        number = {state: i for i, state in enumerate(quiet + loud)}
+        self.accept_from = len(quiet) * self.stride
+
+        self.delta = array('i', [0]) * (states * self.stride)
+        self.outputs = {}
+        for state in order:
+            base = number[state] * self.stride
+            for ch in range(self.stride):
+                nxt = goto[state][ch]
+                if nxt == -1:
+                    # Borrow the (already resolved) row of the failure state
+                    target = self.delta[number[fail[state]] * self.stride + ch]
+                else:
+                    target = number[nxt] * self.stride
+                self.delta[base + ch] = target
+            if out[state]:
+                self.outputs[base] = tuple(out[state])
+
+        # whole_words: start as if a separator was just read
+        self.start = self.delta[self.separator] if self.whole_words else 0
+
+    @staticmethod
+    def build_classes(alphabet, separator):
+        classes = _CharClasses(separator)
+        for code in range(128):
+            classes[code] = '\x00' if is_word_char(chr(code)) else classes.separator
+        for character, index in alphabet.items():
+            classes[ord(character)] = chr(index)
+        return classes
+
+    def save(self, path, extra=None):
+        '''
+            Write the DFA (plus any JSON-able `extra`) to `path` atomically
+        '''
+        header = json.dumps({
+            "words": self.words,
+            "whole_words": self.whole_words,
+            "stride": self.stride,
+            "alphabet": self.alphabet,
+            "offsets": self.offsets,
+            "accept_from": self.accept_from,
+            "start": self.start,
+            "outputs": sorted(self.outputs.items()),
+            "size": len(self.delta),
+            "extra": extra,
+        }).encode('utf-8')
+        prefix = self.MAGIC + struct.pack('<I', len(header)) + header
+        prefix += b'\x00' * (-len(prefix) % self.delta.itemsize)
+
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(prefix)
+            f.write(self.delta.tobytes())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        '''
+            (dfa, extra) from a file written by save(). The transition table
+            is a read-only memory map, so processes loading the same file share
+            its pages instead of each holding a copy
+        '''
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        delta = None
+        try:
+            if data[:len(cls.MAGIC)] != cls.MAGIC:
+                raise ValueError(f"{path}: not a compiled automaton")
+            start = len(cls.MAGIC)
+            (size,) = struct.unpack_from('<I', data, start)
+            start += 4
+            header = json.loads(data[start:start + size].decode('utf-8'))
+            start += size
+            start += -start % array('i').itemsize
+
+            delta = memoryview(data)[start:].cast('i')
+            if len(delta) != header["size"]:
+                raise ValueError(f"{path}: truncated transition table")
+        except Exception:
+            # the view has to go first, an exported map can't be closed
+            if delta is not None:
+                delta.release()
+            data.close()
+            raise
+
+        self = cls.__new__(cls)
+        self.words = header["words"]
+        self.whole_words = header["whole_words"]
+        self.stride = header["stride"]
+        self.alphabet = header["alphabet"]
+        self.separator = self.alphabet.get(SEPARATOR, 0)
+        self.offsets = header["offsets"]
+        self.classes = cls.build_classes(self.alphabet, self.separator)
+        self.delta = delta
+        self.outputs = {base: tuple(ids) for base, ids in header["outputs"]}
+        self.accept_from = header["accept_from"]
+        self.start = header["start"]
+        self._mmap = data
+        return self, header["extra"]
+
+    def iter_matches(self, text):
+        '''
+            Yield (word, start) for every match in `text`, scanned as-is
+        '''
+        codes = text.translate(self.classes)
+        codes = codes.encode('latin-1') if self.stride <= 256 else map(ord, codes)
+
+        delta, outputs, accept_from = self.delta, self.outputs, self.accept_from
+        words, offsets = self.words, self.offsets
+        state = self.start
+        for i, c in enumerate(codes):
+            state = delta[state + c]
+            if state >= accept_from:
+                for j in outputs[state]:
+                    yield words[j], i - offsets[j]
+
+        if self.whole_words:
+            # trailing separator for a word that ends the text
+            state = delta[state + self.separator]
+            if state >= accept_from:
+                for j in outputs[state]:
+                    yield words[j], len(text) - offsets[j]
+
+    def search_words(self, text):
+        '''
+            Same contract as AhoCorasick.search_words
+        '''
+        result = defaultdict(list)
+        if not self.words:
+            return result
 
-                    result[word].append(i-len(word)+1)
+        text = text.lower()
+        if not self.whole_words:
+            text = re.sub(r'[^\w\s]', '', text)
+        for word, start in self.iter_matches(text):
+            result[word].append(start)
         return result
 
 # ============= Test =============
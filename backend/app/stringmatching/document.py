@@ -0,0 +1,53 @@
+import re
+
+PUNCTUATION = re.compile(r'[^\w\s]')
+CHUNK = re.compile(r'\S+')
+
+
+class Document:
+    '''
+    Text lowercased and tokenized once, shared by the coin matcher, the exact
+    (Aho-Corasick) matcher and the fuzzy matcher.
+
+    Tokens are what FuzzyMatcher.get_ngrams used to produce on every call:
+    punctuation removed, split on whitespace. offsets[i] is where token i
+    starts in `lower`.
+    '''
+
+    def __init__(self, text):
+        self.text = text
+        self.lower = text.lower()
+
+        self.tokens = []
+        self.offsets = []
+        for chunk in CHUNK.finditer(self.lower):
+            token = chunk.group()
+            if not token.isalnum():
+                token = PUNCTUATION.sub('', token)
+                if not token:
+                    continue
+            self.tokens.append(token)
+            self.offsets.append(chunk.start())
+
+        self._ngrams = {1: self.tokens}
+        self._clean = None
+
+    @classmethod
+    def of(cls, text):
+        return text if isinstance(text, cls) else cls(text)
+
+    @property
+    def clean(self):
+        '''Lowercased text with punctuation removed'''
+        if self._clean is None:
+            self._clean = PUNCTUATION.sub('', self.lower)
+        return self._clean
+
+    def ngrams(self, n):
+        '''
+            n consecutive tokens joined by a space, computed once per n
+        '''
+        if n not in self._ngrams:
+            tokens = self.tokens
+            self._ngrams[n] = [' '.join(tokens[i:i+n]) for i in range(len(tokens)-n+1)]
+        return self._ngrams[n]
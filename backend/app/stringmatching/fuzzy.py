@@ -1,6 +1,8 @@
 
 import re
 
+from .document import Document
+
 class FuzzyMatcher:
 
     def __init__(self, threshold = 0.7):
@@ -22,29 +24,79 @@ class FuzzyMatcher:
 
         return result
 
-    def levenshtein_distance(self, word1, word2):
+    def ngrams(self, text, n):
+        '''
+        get_ngrams, reusing the tokens when `text` is an already analyzed Document
+        '''
+        if isinstance(text, Document):
+            return text.ngrams(n)
+        return self.get_ngrams(text, n)
+
+    def levenshtein_distance(self, word1, word2, max_distance=None):
         '''
         Menghitung levenshtein distance/ edit distance
+
+        With `max_distance` only the diagonal band |i - j| <= max_distance is
+        computed (two rolling rows), and the scan stops as soon as a whole row
+        is over the bound. Anything over the bound is returned as
+        max_distance + 1, not the exact distance.
         '''
         row, col = len(word1), len(word2)
-        cache = [[float("inf")] * (col + 1) for i in range(row + 1)]
-
-        for j in range (col + 1):
-            cache[row][j] = col - j
-        for i in range (row + 1):
-            cache[i][col] = row - i
-        
-        for i in range(row - 1, -1, -1):
-            for j in range (col -1, -1, -1):
-                if word1[i] == word2[j]:
-                    cache[i][j] = cache[i+1][j+1]
+        if max_distance is None:
+            max_distance = max(row, col)
+
+        over = max_distance + 1
+        if abs(row - col) > max_distance:
+            return over
+
+        prev = [j if j <= max_distance else over for j in range(col + 1)]
+        cur = [over] * (col + 1)
+
+        for i in range(1, row + 1):
+            lo = max(1, i - max_distance)
+            hi = min(col, i + max_distance)
+
+            # cells just outside the band must read as "too far"
+            cur[lo - 1] = i if lo == 1 and i <= max_distance else over
+            if hi < col:
+                cur[hi + 1] = over
+
+            best = cur[lo - 1]
+            char1 = word1[i - 1]
+            for j in range(lo, hi + 1):
+                if char1 == word2[j - 1]:
+                    value = prev[j - 1]
                 else:
-                    cache[i][j] = 1 + min(
-                        cache[i + 1][j], #delete
-                        cache[i][j+1], #insert
-                        cache[i+1][j+1] #replace
+                    value = 1 + min(
+                        prev[j], #delete
+                        cur[j - 1], #insert
+                        prev[j - 1] #replace
                     )
-        return cache[0][0]
+                if value > over:
+                    value = over
+                cur[j] = value
+                if value < best:
+                    best = value
+
+            # row minimum never goes down again -> early exit
+            if best > max_distance:
+                return over
+            prev, cur = cur, prev
+
+        return prev[col]
+
+    @staticmethod
+    def max_edits(max_len, threshold):
+        '''
+        Largest distance d with 1 - d/max_len >= threshold (-1 if none), using
+        the same float expression as calculate_similarity
+        '''
+        edits = min(max_len, int((1 - threshold) * max_len))
+        while edits < max_len and 1 - ((edits + 1) / max_len) >= threshold:
+            edits += 1
+        while edits >= 0 and 1 - (edits / max_len) < threshold:
+            edits -= 1
+        return edits
 
 
     def calculate_similarity(self, word1, word2):
@@ -64,6 +116,25 @@ class FuzzyMatcher:
         similarity = 1 - (distance / max_len)
         return similarity
 
+    def similarity_at_least(self, word1, word2, threshold):
+        '''
+        calculate_similarity, but only when it is >= threshold (None otherwise).
+        Pairs whose length difference already needs too many edits are
+        skipped, the rest go through the banded kernel.
+        '''
+        max_len = max(len(word1), len(word2))
+        if max_len == 0:
+            return 1.0 if threshold <= 1.0 else None
+
+        edits = self.max_edits(max_len, threshold)
+        if edits < 0 or abs(len(word1) - len(word2)) > edits:
+            return None
+
+        distance = self.levenshtein_distance(word1, word2, edits)
+        if distance > edits:
+            return None
+        return 1 - (distance / max_len)
+
 
     def fuzzy_search(self, keyword, cv_text, threshold=None):
         '''
@@ -75,23 +146,23 @@ class FuzzyMatcher:
 
         n = max(1, len(keyword.split()))
 
-        ngrams = self.get_ngrams(cv_text, n)
+        ngrams = self.ngrams(cv_text, n)
 
 
         matches = []
 
         for phrase in ngrams:
-            similarity = self.calculate_similarity(keyword, phrase)
-            if similarity >= threshold:
+            similarity = self.similarity_at_least(keyword, phrase, threshold)
+            if similarity is not None:
                 matches.append((similarity, phrase))
 
         if ' ' in keyword:
             clean_keyword = keyword.replace(' ', '')
-            single_words = self.get_ngrams(cv_text, 1) # individual words
+            single_words = self.ngrams(cv_text, 1) # individual words
 
             for word in single_words:
-                similarity = self.calculate_similarity(clean_keyword, word)
-                if similarity >= threshold:
+                similarity = self.similarity_at_least(clean_keyword, word, threshold)
+                if similarity is not None:
 
                     # Check if this match is already covered to avoid duplicates
                     is_duplicate = any(word in existing_match[1] for existing_match in matches)
@@ -0,0 +1,256 @@
+import math
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+from .document import Document
+from .fuzzy import FuzzyMatcher
+
+
+def bigrams(word):
+    '''
+        Distinct character bigrams of the word padded at both ends
+    '''
+    padded = '\x02' + word + '\x03'
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+def gram_key(gram):
+    return ord(gram[0]) << 21 | ord(gram[1])
+
+
+def phrase_bigrams(phrases):
+    '''
+        bigrams() of many phrases at once: (phrase index, bigram key) pairs,
+        distinct per phrase, plus the number of distinct bigrams per phrase
+    '''
+    padded = ''.join('\x02' + phrase + '\x03' for phrase in phrases)
+    codes = np.frombuffer(padded.encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+    sizes = np.array([len(phrase) + 2 for phrase in phrases], dtype=np.int64)
+    owner = np.repeat(np.arange(len(phrases)), sizes)[:-1]
+    keys = codes[:-1] << 21 | codes[1:]
+
+    # drop the pairs that straddle two phrases
+    valid = np.ones(len(keys), dtype=bool)
+    valid[np.cumsum(sizes)[:-1] - 1] = False
+    owner, keys = owner[valid], keys[valid]
+
+    # keys are < 2**42 (two code points), so (owner, key) packs into one int64
+    if len(phrases) < 2 ** 21:
+        packed = np.unique(owner << 42 | keys)
+        owner, keys = packed >> 42, packed & (2 ** 42 - 1)
+    else:
+        order = np.lexsort((keys, owner))
+        owner, keys = owner[order], keys[order]
+        first = np.ones(len(keys), dtype=bool)
+        first[1:] = (owner[1:] != owner[:-1]) | (keys[1:] != keys[:-1])
+        owner, keys = owner[first], keys[first]
+    return owner, keys, np.bincount(owner, minlength=len(phrases))
+
+
+class _Bucket:
+    '''
+    Strings compared against text n-grams of one size, with a bigram
+    inverted index over them
+    '''
+
+    def __init__(self):
+        self.words = []
+        self.keywords = []
+        self.gram_counts = []
+        self.ids = {}
+        self.postings = defaultdict(list)
+        self.longest = 0
+        self._arrays = None
+
+    def add(self, word, keyword):
+        if word in self.ids:
+            self.keywords[self.ids[word]].add(keyword)
+            return
+
+        word_id = len(self.words)
+        self.ids[word] = word_id
+        self.words.append(word)
+        self.keywords.append({keyword})
+
+        grams = bigrams(word)
+        self.gram_counts.append(len(grams))
+        for gram in grams:
+            self.postings[gram].append(word_id)
+        self.longest = max(self.longest, len(word))
+        self._arrays = None
+
+    def arrays(self):
+        '''
+            NumPy form for lookup_many: bigram keys (sorted) with the postings
+            of each as CSR, word lengths and bigram counts. Built once, the
+            bucket never changes after init
+        '''
+        if self._arrays is None:
+            grams = sorted(self.postings, key=gram_key)
+            keys = np.array([gram_key(gram) for gram in grams], dtype=np.int64)
+            ptr = np.zeros(len(grams) + 1, dtype=np.int64)
+            ptr[1:] = np.cumsum([len(self.postings[gram]) for gram in grams])
+            words = np.array([w for gram in grams for w in self.postings[gram]], dtype=np.int64)
+            lengths = np.array([len(word) for word in self.words], dtype=np.int64)
+            self._arrays = (keys, ptr, words, lengths, np.array(self.gram_counts, dtype=np.int64))
+        return self._arrays
+
+
+class FuzzyIndex:
+    '''
+    Keyword lexicon compiled for fuzzy lookup.
+
+    Gives the same answer as calling FuzzyMatcher.fuzzy_search(kw, text) for
+    every keyword and keeping those with count > 0, but each distinct text
+    n-gram is looked up once against all keywords of that size.
+
+    Lookup is a character-bigram inverted index plus verification: one edit
+    destroys at most 2 bigrams, so a keyword within k edits of the n-gram
+    shares at least max(bigrams) - 2k of them. Only keywords that pass this
+    count filter (and the length filter) reach the bounded Levenshtein check.
+    '''
+
+    CACHE_SIZE = 65536
+
+    def __init__(self, keywords, threshold=None, matcher=None):
+        self.matcher = matcher or FuzzyMatcher()
+        self.threshold = self.matcher.threshold if threshold is None else threshold
+
+        # n-gram size -> strings compared against those n-grams
+        self.buckets = defaultdict(_Bucket)
+        for keyword in keywords:
+            n = max(1, len(keyword.split()))
+            self.buckets[n].add(keyword, keyword)
+
+            # fuzzy_search also tries multi-word keywords glued together
+            if ' ' in keyword:
+                self.buckets[1].add(keyword.replace(' ', ''), keyword)
+
+        # shared by the request threads: reads, inserts and the eviction
+        # all go through the lock
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+        self._edits = {}
+
+    def max_edits(self, max_len):
+        if max_len not in self._edits:
+            self._edits[max_len] = self.matcher.max_edits(max_len, self.threshold)
+        return self._edits[max_len]
+
+    def radius(self, phrase, longest):
+        '''
+            Edits allowed between `phrase` and the longest word it could match
+        '''
+        if self.threshold > 0:
+            # d >= len(w) - len(phrase) and d <= (1 - t) * len(w) => len(w) <= len(phrase) / t
+            longest = min(longest, math.ceil(len(phrase) / self.threshold))
+        return self.max_edits(max(len(phrase), longest))
+
+    def lookup(self, n, phrase):
+        '''
+            Keywords whose similarity with `phrase` (an n-gram) reaches threshold
+        '''
+        key = (n, phrase)
+        with self._cache_lock:
+            found = self._cache.get(key)
+        if found is not None:
+            return found
+
+        # .get: a lookup must not add buckets while other threads iterate them
+        bucket = self.buckets.get(n) or _Bucket()
+        found = set()
+        radius = self.radius(phrase, bucket.longest)
+        if radius >= 0:
+            grams = bigrams(phrase)
+
+            if len(grams) - 2 * radius >= 1:
+                # any match shares a bigram -> candidates come from the postings
+                common = defaultdict(int)
+                for gram in grams:
+                    for word_id in bucket.postings.get(gram, ()):
+                        common[word_id] += 1
+                candidates = common.items()
+            else:
+                # too short/repetitive for the filter, fall back to every word
+                candidates = ((word_id, None) for word_id in range(len(bucket.words)))
+
+            for word_id, shared in candidates:
+                word = bucket.words[word_id]
+                max_len = max(len(word), len(phrase))
+                edits = self.max_edits(max_len)
+                if abs(len(word) - len(phrase)) > edits:
+                    continue
+                if shared is not None and shared < max(len(grams), bucket.gram_counts[word_id]) - 2 * edits:
+                    continue
+                if self.matcher.similarity_at_least(word, phrase, self.threshold) is not None:
+                    found |= bucket.keywords[word_id]
+
+        with self._cache_lock:
+            if len(self._cache) >= self.CACHE_SIZE:
+                self._cache.clear()
+            self._cache[key] = found
+        return found
+
+    def lookup_many(self, n, phrases):
+        '''
+            [lookup(n, p) for p in phrases] for many phrases at once: bigrams,
+            radius and the length / bigram-count filters are computed for all
+            (phrase, keyword) pairs in NumPy, only the pairs that survive reach
+            the Levenshtein check
+        '''
+        results = [set() for _ in phrases]
+        bucket = self.buckets.get(n)
+        if bucket is None or not bucket.words or not phrases:
+            return results
+        gram_keys, ptr, posting_words, word_len, word_grams = bucket.arrays()
+        n_words = len(bucket.words)
+
+        phrase_len = np.array([len(phrase) for phrase in phrases], dtype=np.int64)
+        owner, keys, phrase_grams = phrase_bigrams(phrases)
+
+        # radius() for every phrase
+        longest = max(int(phrase_len.max()), bucket.longest)
+        edits_table = np.array([0] + [self.max_edits(length) for length in range(1, longest + 1)], dtype=np.int64)
+        reach = np.full(len(phrases), bucket.longest, dtype=np.int64)
+        if self.threshold > 0:
+            reach = np.minimum(reach, np.ceil(phrase_len / self.threshold).astype(np.int64))
+        radius = edits_table[np.maximum(phrase_len, reach)]
+        use_filter = (radius >= 0) & (phrase_grams - 2 * radius >= 1)
+        scan_all = (radius >= 0) & ~use_filter
+
+        # (phrase, word, shared bigrams) through the postings...
+        at = np.minimum(np.searchsorted(gram_keys, keys), len(gram_keys) - 1)
+        known = (gram_keys[at] == keys) & use_filter[owner]
+        rows, grams = owner[known], at[known]
+        counts = ptr[grams + 1] - ptr[grams]
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        pairs = np.repeat(rows, counts) * n_words + posting_words[np.repeat(ptr[grams], counts) + within]
+        pairs, shared = np.unique(pairs, return_counts=True)
+        # ...plus every word for phrases too short for the filter (shared unused)
+        everything = (np.flatnonzero(scan_all)[:, None] * n_words + np.arange(n_words)).ravel()
+        pairs = np.concatenate([pairs, everything])
+        filtered = np.concatenate([np.ones(len(shared), dtype=bool), np.zeros(len(everything), dtype=bool)])
+        shared = np.concatenate([shared, np.zeros(len(everything), dtype=np.int64)])
+
+        rows, words = pairs // n_words, pairs % n_words
+        edits = edits_table[np.maximum(word_len[words], phrase_len[rows])]
+        keep = np.abs(word_len[words] - phrase_len[rows]) <= edits
+        keep &= ~filtered | (shared >= np.maximum(phrase_grams[rows], word_grams[words]) - 2 * edits)
+
+        for i, w in zip(rows[keep].tolist(), words[keep].tolist()):
+            if self.matcher.similarity_at_least(bucket.words[w], phrases[i], self.threshold) is not None:
+                results[i] |= bucket.keywords[w]
+        return results
+
+    def search(self, text):
+        '''
+            Set of keywords that fuzzy-match somewhere in `text` (str or Document)
+        '''
+        doc = Document.of(text)
+        found = set()
+        for n in list(self.buckets):
+            for phrase in set(doc.ngrams(n)):
+                found |= self.lookup(n, phrase)
+        return found
@@ -0,0 +1,106 @@
+from collections import defaultdict
+import hashlib
+import json
+import os
+import re
+
+from .aho_corasick import AhoCorasick, CompiledAhoCorasick
+from .document import Document
+
+
+class KeywordMatcher:
+    '''
+    Satu automaton Aho-Corasick untuk beberapa kamus sekaligus.
+
+    `dictionaries` is a mapping of group name -> {label: [aliases]}, e.g.
+    {"coins": {"BTC": ["bitcoin", "btc"]}, "positive": {"pump": ["pump"]}}.
+    `scan` walks the text once and returns the labels hit in every group.
+
+    With whole_words (the default) aliases only match as whole words, so
+    "sol" does not fire on "solution" nor "down" on "countdown".
+    '''
+
+    def __init__(self, dictionaries, whole_words=True):
+        self.groups = list(dictionaries)
+        self.whole_words = whole_words
+
+        # cleaned pattern -> list of (group, label) it reports
+        self.labels = defaultdict(list)
+        for group, entries in dictionaries.items():
+            for label, aliases in entries.items():
+                for alias in aliases:
+                    pattern = self.clean(alias)
+                    if pattern and (group, label) not in self.labels[pattern]:
+                        self.labels[pattern].append((group, label))
+
+        self.automaton = AhoCorasick(list(self.labels), whole_words=whole_words).compile()
+
+    @staticmethod
+    def lexicon_hash(dictionaries, whole_words=True):
+        data = json.dumps([dictionaries, whole_words], sort_keys=True)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    def save(self, path, lexicon_hash=None):
+        self.automaton.save(path, extra={
+            "lexicon_hash": lexicon_hash,
+            "groups": self.groups,
+            "labels": list(self.labels.items()),
+        })
+
+    @classmethod
+    def load(cls, path):
+        '''
+            Matcher from an artifact written by save(), nothing is rebuilt
+        '''
+        automaton, extra = CompiledAhoCorasick.load(path)
+        self = cls.__new__(cls)
+        self.groups = extra["groups"]
+        self.whole_words = automaton.whole_words
+        self.labels = defaultdict(list)
+        for pattern, labels in extra["labels"]:
+            self.labels[pattern] = [tuple(label) for label in labels]
+        self.automaton = automaton
+        self.lexicon_hash = extra["lexicon_hash"]
+        return self
+
+    @classmethod
+    def cached(cls, dictionaries, path, whole_words=True):
+        '''
+            Load the compiled matcher from `path` if it was built from the same
+            dictionaries, otherwise build it and (re)write the artifact
+        '''
+        lexicon_hash = cls.lexicon_hash(dictionaries, whole_words)
+        try:
+            matcher = cls.load(path)
+            if matcher.lexicon_hash == lexicon_hash:
+                return matcher
+        except (OSError, ValueError, KeyError):
+            pass  # missing, stale format or corrupt -> rebuild
+
+        matcher = cls(dictionaries, whole_words=whole_words)
+        matcher.lexicon_hash = lexicon_hash
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            matcher.save(path, lexicon_hash)
+        except OSError as e:
+            print("[MATCHER] Could not write", path, e)
+        return matcher
+
+    @staticmethod
+    def clean(word):
+        '''Normalize a dictionary entry the same way AhoCorasick does'''
+        return ' '.join(re.sub(r'[^\w\s]', '', word.lower()).split())
+
+    def scan(self, text):
+        '''
+            Single pass over `text` (str or Document), returns {group: set(labels)}
+        '''
+        doc = Document.of(text)
+        found = {group: set() for group in self.groups}
+
+        # punctuation is a word boundary in whole_words mode, not noise
+        text = doc.lower if self.whole_words else doc.clean
+        for pattern, _ in self.automaton.iter_matches(text):
+            for group, label in self.labels[pattern]:
+                found[group].add(label)
+        return found
@@ -0,0 +1,139 @@
+from concurrent.futures import Future
+import os
+import queue
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+# Jobs committed in one transaction at most
+WRITE_BATCH = int(os.getenv("DB_WRITE_BATCH", "64"))
+# How long the writer waits for more jobs before committing what it has
+WRITE_LINGER = float(os.getenv("DB_WRITE_LINGER_MS", "5")) / 1000
+
+_STOP = object()
+
+
+class DbWriter:
+    '''
+    The one thread that writes to SQLite (STORAGE_MODE=wal).
+
+    SQLite takes one writer at a time; with every write queued here, ingest
+    never races another connection for the lock, and jobs that arrive
+    together share one transaction (one fsync).
+
+    A job is fn(session, *args). It runs inside its own SAVEPOINT, so its
+    session.commit() calls only release savepoints and a job that raises is
+    undone alone. The batch is committed once, then the futures resolve.
+    '''
+
+    def __init__(self, engine, max_batch=WRITE_BATCH, linger=WRITE_LINGER):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.linger = linger
+        self.batches = 0  # transactions committed
+        self._queue = queue.Queue()
+        self._thread = None
+        # submit() vs stop(): nothing may be queued behind _STOP
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        '''
+            Commits everything already queued, then ends the thread; later
+            submit() calls raise
+        '''
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is None:
+                return
+            self._queue.put(_STOP)
+        thread.join()
+
+    def submit(self, job, *args):
+        '''
+            Queue a job -> concurrent.futures.Future of its return value.
+            RuntimeError when the writer is not running (never started or
+            stopped): the job would wait forever
+        '''
+        future = Future()
+        with self._lock:
+            if self._thread is None:
+                raise RuntimeError("DbWriter is not running")
+            self._queue.put((job, args, future))
+        return future
+
+    def run(self, job, *args):
+        '''
+            Queue a job and wait for its commit (worker threads only)
+        '''
+        return self.submit(job, *args).result()
+
+    def _next_batch(self):
+        item = self._queue.get()
+        if item is _STOP:
+            return None
+        batch = [item]
+        deadline = time.monotonic() + self.linger
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # commit this batch first, stop on the next round
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._commit(batch)
+
+    def _commit(self, batch):
+        outcomes = []
+        try:
+            with self.engine.connect() as conn, conn.begin():
+                for job, args, future in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    savepoint = conn.begin_nested()
+                    session = Session(bind=conn, join_transaction_mode="create_savepoint")
+                    try:
+                        result = job(session, *args)
+                        session.commit()
+                        savepoint.commit()
+                        outcomes.append((future, result, None))
+                    except Exception as e:
+                        session.rollback()
+                        savepoint.rollback()
+                        outcomes.append((future, None, e))
+                    finally:
+                        session.close()
+        except Exception as e:
+            # BEGIN / COMMIT failed: nothing of this batch was written
+            print("[WRITER] Batch failed:", e)
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
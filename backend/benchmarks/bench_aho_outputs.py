@@ -0,0 +1,80 @@
+'''
+Hit-reporting cost of AhoCorasick: per-state output lists vs the old
+bitmask scan over every dictionary word.
+
+    cd backend && python -m benchmarks.bench_aho_outputs
+'''
+import random
+import string
+import time
+
+from app.stringmatching.aho_corasick import AhoCorasick
+
+SIZES = [100, 1000, 10000]
+TEXT_WORDS = 2000
+SEED = 42
+
+
+def make_patterns(rng, n):
+    patterns = set()
+    while len(patterns) < n:
+        length = rng.randint(3, 8)
+        patterns.add(''.join(rng.choice(string.ascii_lowercase[:12]) for _ in range(length)))
+    return sorted(patterns)
+
+
+def make_text(rng, patterns):
+    # Half dictionary words, half noise, so plenty of states report hits
+    noise = [''.join(rng.choice(string.ascii_lowercase) for _ in range(6)) for _ in range(200)]
+    return ' '.join(
+        rng.choice(patterns) if rng.random() < 0.5 else rng.choice(noise)
+        for _ in range(TEXT_WORDS)
+    )
+
+
+def search_bitmask(automaton, masks, text):
+    '''The pre-output-list reporting loop, kept here as the baseline'''
+    result = {}
+    state = 0
+    for i in range(len(text)):
+        state = automaton.find_next_state(state, text[i])
+        if masks[state] == 0:
+            continue
+        for j in range(len(automaton.words)):
+            if masks[state] & (1 << j):
+                word = automaton.words[j]
+                result.setdefault(word, []).append(i - len(word) + 1)
+    return result
+
+
+def timed(fn, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    rng = random.Random(SEED)
+    print(f"{'patterns':>9} {'hits':>7} {'bitmask (s)':>12} {'lists (s)':>10} {'compiled (s)':>13}")
+    for size in SIZES:
+        patterns = make_patterns(rng, size)
+        text = make_text(rng, patterns)
+
+        automaton = AhoCorasick(patterns)
+        compiled = automaton.compile()
+        masks = [sum(1 << j for j in ids) for ids in automaton.out]
+
+        t_mask, by_mask = timed(search_bitmask, automaton, masks, text, repeat=1)
+        t_list, by_list = timed(automaton.search_words, text)
+        t_dfa, by_dfa = timed(compiled.search_words, text)
+        assert by_mask == dict(by_list) == dict(by_dfa)
+
+        hits = sum(len(v) for v in by_list.values())
+        print(f"{size:>9} {hits:>7} {t_mask:>12.4f} {t_list:>10.4f} {t_dfa:>13.4f}")
+
+
+if __name__ == '__main__':
+    main()
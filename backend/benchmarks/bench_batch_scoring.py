@@ -0,0 +1,61 @@
+'''
+Re-scoring an archive: analyze_sentiment per headline vs the vectorized
+BatchScorer (arrays only, and with the per-article dicts materialized).
+Every run starts from a fresh Lexicon so the fuzzy lookup cache is cold
+for both sides, and the results are checked to be identical.
+
+    cd backend && python -m benchmarks.bench_batch_scoring
+'''
+import json
+import os
+import random
+import time
+
+from app import lexicon
+from app.batch_scoring import BatchScorer
+from app.sentiment_analysis import analyze_sentiment
+
+SIZES = [10000, 50000]
+SEED = 3
+DATA = os.path.join(os.path.dirname(__file__), "data", "labeled_headlines.json")
+
+
+def make_corpus(rng, size):
+    with open(DATA) as f:
+        headlines = [row["text"] for row in json.load(f)]
+    words = ' '.join(headlines).split()
+    corpus = []
+    while len(corpus) < size:
+        # shuffled headline words plus an id, so every text is distinct
+        sample = rng.sample(words, rng.randint(6, 18))
+        corpus.append(' '.join(sample) + f" #{len(corpus)}")
+    return corpus
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    rng = random.Random(SEED)
+    print(f"{'articles':>9} {'per article (art/s)':>20} {'batch arrays (art/s)':>21} {'batch + dicts (art/s)':>22}")
+    for size in SIZES:
+        corpus = make_corpus(rng, size)
+
+        lex = lexicon.Lexicon.from_file()
+        t_serial, expected = timed(lambda: [analyze_sentiment(text, lex) for text in corpus])
+
+        scorer = BatchScorer(lexicon.Lexicon.from_file())
+        t_arrays, scores = timed(lambda: scorer.score(corpus))
+
+        scorer = BatchScorer(lexicon.Lexicon.from_file())
+        t_dicts, results = timed(lambda: scorer.score(corpus).results())
+        assert results == expected
+
+        print(f"{size:>9} {size / t_serial:>20.0f} {size / t_arrays:>21.0f} {size / t_dicts:>22.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+'''
+Read latency while an ingest writes, per STORAGE_MODE.
+
+Reader threads run the /api/news first-page query in a loop while one
+ingest thread writes big batches (rows + rollups + commit): straight from
+its own session in "rollback" mode, through the DbWriter in "wal" mode.
+Reports read latency percentiles, "database is locked" errors and how much
+got written in the same time.
+
+    cd backend && python -m benchmarks.bench_concurrent_reads
+    cd backend && python -m benchmarks.bench_concurrent_reads --batch 10000   # long commits
+'''
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app import queries
+from app.database import make_engines
+from app.migrations import create_schema
+from app.services import news_key, write_news_rows
+from app.writer import DbWriter
+
+from .generator import make_news
+
+TICKERS = ["BTC", "ETH", "SOL", "XRP", "ADA", "DOGE", "LINK", "AVAX"]
+PRELOAD = 20000
+BATCH = 2000
+
+
+def make_rows(news_list, seed=0):
+    '''
+        News rows with random coins (the matching is not what is measured)
+    '''
+    rng = random.Random(seed)
+    rows = []
+    for news in news_list:
+        published_at = news_key(news)[0]
+        score = rng.choice([-1.0, -0.5, 0.0, 0.5, 1.0])
+        for coin in rng.sample(TICKERS, rng.randint(1, 3)):
+            rows.append({
+                "id": news["id"], "title": news["title"], "description": news["description"],
+                "coin_ticker": coin, "published_at": published_at, "sentiment_score": score,
+            })
+    return rows
+
+
+def batches(rows, size):
+    by_article = {}
+    for row in rows:
+        by_article.setdefault(row["id"], []).append(row)
+    ids = list(by_article)
+    return [[row for news_id in ids[i:i + size] for row in by_article[news_id]] for i in range(0, len(ids), size)]
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def run_mode(mode, path, preload, ingest, readers, seconds):
+    write_engine, read_engine = make_engines(f"sqlite:///{path}", mode, read_pool_size=readers)
+    create_schema(write_engine)
+    WriteSession = sessionmaker(bind=write_engine)
+    ReadSession = sessionmaker(bind=read_engine)
+    with WriteSession() as db:
+        for batch in preload:
+            write_news_rows(db, batch)
+
+    writer = DbWriter(write_engine) if mode == "wal" else None
+    if writer:
+        writer.start()
+
+    stop = threading.Event()
+    latencies, errors, written = [], [], [0]
+    statement = queries.news_select(list(queries.NEWS_FIELDS)).limit(101)
+
+    def read_loop():
+        clock = time.perf_counter
+        while not stop.is_set():
+            start = clock()
+            try:
+                with ReadSession() as db:
+                    db.execute(statement).mappings().all()
+            except OperationalError as e:
+                errors.append(str(e.orig))
+                continue
+            latencies.append(clock() - start)
+
+    def ingest_loop():
+        for batch in ingest:
+            if stop.is_set():
+                return
+            try:
+                if writer:
+                    writer.run(write_news_rows, batch)
+                else:
+                    with WriteSession() as db:
+                        write_news_rows(db, batch)
+                written[0] += len(batch)
+            except OperationalError as e:
+                errors.append(str(e.orig))
+
+    threads = [threading.Thread(target=read_loop) for _ in range(readers)]
+    threads.append(threading.Thread(target=ingest_loop))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    if writer:
+        writer.stop()
+    write_engine.dispose()
+    read_engine.dispose()
+
+    latencies.sort()
+    return {
+        "reads": len(latencies),
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "errors": len(errors),
+        "rows_written": written[0],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--preload", type=int, default=PRELOAD)
+    parser.add_argument("--batch", type=int, default=BATCH)
+    args = parser.parse_args(argv)
+
+    # ingest articles come after the preloaded ones (newer ids / dates)
+    news = make_news(args.preload + 50 * args.batch, seed=0)
+    rows = make_rows(news)
+    preload_ids = {item["id"] for item in news[:args.preload]}
+    preload = batches([row for row in rows if row["id"] in preload_ids], args.batch)
+    ingest = batches([row for row in rows if row["id"] not in preload_ids], args.batch)
+
+    print(f"{args.readers} readers, ingest in batches of {args.batch} articles, "
+          f"{args.preload} articles preloaded, {args.seconds:.0f}s per mode")
+    print(f"{'mode':<9} {'reads':>7} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'max (ms)':>9} {'locked':>7} {'rows written':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("rollback", "wal"):
+            r = run_mode(mode, os.path.join(tmp, f"{mode}.db"), preload, ingest, args.readers, args.seconds)
+            print(f"{mode:<9} {r['reads']:>7} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+                  f"{r['max_ms']:>9.2f} {r['errors']:>7} {r['rows_written']:>13}")
+
+
+if __name__ == '__main__':
+    main()
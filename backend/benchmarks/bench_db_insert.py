@@ -0,0 +1,122 @@
+'''
+Cold-start backfill of 10k articles: the old per-article existence query +
+ORM add, vs one IN query + Core executemany with ON CONFLICT DO NOTHING.
+
+    cd backend && python -m benchmarks.bench_db_insert
+'''
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.migrations import create_schema
+from app.models import Article, ArticleCoin, News
+from app.pipeline import analyze_articles
+from app.services import bulk_insert_news, existing_news_ids, insert_news_to_db
+
+ARTICLES = 10000
+SEED = 3
+
+COINS = ["bitcoin", "ethereum", "solana", "xrp", "cardano", "dogecoin", "chainlink", "avalanche"]
+WORDS = "price market traders said after week rally crash pump dump upgrade hacked listing analysts".split()
+
+
+def make_news(rng, count):
+    start = datetime(2024, 1, 1)
+    news = []
+    for i in range(count):
+        coins = rng.sample(COINS, rng.randint(1, 3))
+        news.append({
+            "id": i + 1,
+            "title": " ".join(coins + rng.sample(WORDS, 4)),
+            "description": " ".join(rng.choice(WORDS) for _ in range(20)),
+            "published_at": (start + timedelta(minutes=i)).isoformat(),
+        })
+    return news
+
+
+def fresh_session(path):
+    engine = create_engine(f"sqlite:///{path}")
+    create_schema(engine)
+    return engine, sessionmaker(bind=engine)()
+
+
+def build_rows(news_list, analyses):
+    rows = []
+    for news, analysis in zip(news_list, analyses):
+        for coin in analysis["coins"]:
+            rows.append({
+                "id": news["id"],
+                "title": news["title"],
+                "description": news["description"],
+                "coin_ticker": coin,
+                "published_at": datetime.fromisoformat(news["published_at"]),
+                "sentiment_score": analysis["sentiment"]["score"],
+            })
+    return rows
+
+
+def write_per_row(db, news_list, rows):
+    '''The old insert_news_to_db write path, kept here as the baseline'''
+    by_id = {}
+    for row in rows:
+        by_id.setdefault(row["id"], []).append(row)
+    for news in news_list:
+        if db.query(Article).filter(Article.id == news["id"]).first():
+            continue
+        article_rows = by_id.get(news["id"], [])
+        if article_rows:
+            row = article_rows[0]
+            db.add(Article(id=row["id"], title=row["title"], description=row["description"],
+                           published_at=row["published_at"], sentiment_score=row["sentiment_score"]))
+        for row in article_rows:
+            db.add(ArticleCoin(article_id=row["id"], coin_ticker=row["coin_ticker"],
+                               published_at=row["published_at"], sentiment_score=row["sentiment_score"]))
+    db.commit()
+
+
+def write_bulk(db, news_list, rows):
+    existing = existing_news_ids(db, [news["id"] for news in news_list])
+    bulk_insert_news(db, [row for row in rows if row["id"] not in existing])
+    db.commit()
+
+
+def main():
+    rng = random.Random(SEED)
+    news_list = make_news(rng, ARTICLES)
+
+    start = time.perf_counter()
+    analyses = analyze_articles([n["title"] + " " + n["description"] for n in news_list])
+    t_analysis = time.perf_counter() - start
+    rows = build_rows(news_list, analyses)
+
+    print(f"{ARTICLES} articles, {len(rows)} news rows (analysis: {t_analysis:.2f}s)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, write in [("per-row (old)", write_per_row), ("bulk", write_bulk)]:
+            engine, db = fresh_session(os.path.join(tmp, f"{name[:4]}.db"))
+            start = time.perf_counter()
+            write(db, news_list, rows)
+            print(f"  DB write, {name:<14} {time.perf_counter() - start:8.2f}s")
+            db.close()
+            engine.dispose()
+
+        engine, db = fresh_session(os.path.join(tmp, "full.db"))
+        start = time.perf_counter()
+        insert_news_to_db(news_list, db, limit=None)
+        print(f"  insert_news_to_db end to end {time.perf_counter() - start:6.2f}s")
+        assert db.query(News).count() == len(rows)
+
+        # second run: everything already stored
+        start = time.perf_counter()
+        insert_news_to_db(news_list, db, limit=None)
+        print(f"  re-run, all duplicates       {time.perf_counter() - start:6.2f}s")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+'''
+Per-article fuzzy matching latency as the lexicon grows: one fuzzy_search
+per keyword (brute force) vs the FuzzyIndex bigram index.
+
+    cd backend && python -m benchmarks.bench_fuzzy_index
+'''
+import random
+import time
+
+from app import lexicon
+from app.stringmatching.fuzzy import FuzzyMatcher
+from app.stringmatching.fuzzy_index import FuzzyIndex
+
+keywords = lexicon.current().keywords
+SIZES = [len(keywords["positive"]) + len(keywords["negative"]), 500, 2000, 5000]
+ARTICLES = 10
+ARTICLE_WORDS = 60
+BRUTE_FORCE_MAX = 2000
+SEED = 7
+
+SYLLABLES = [c + v for c in "bcdfghjklmnprstvwz" for v in "aeiou"] + ["st", "ng", "x", "r"]
+
+
+def make_lexicon(rng, size):
+    lexicon = list(keywords["positive"] + keywords["negative"])
+    while len(lexicon) < size:
+        words = [
+            ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+            for _ in range(rng.choice([1, 1, 1, 2, 3]))
+        ]
+        lexicon.append(' '.join(words))
+    return lexicon[:size]
+
+
+def make_article(rng, lexicon):
+    filler = "the market price traders said today after week analysts expect".split()
+    words = []
+    while len(words) < ARTICLE_WORDS:
+        if rng.random() < 0.1:
+            keyword = list(rng.choice(lexicon).lower())
+            keyword[rng.randrange(len(keyword))] = rng.choice('aeiou')  # typo
+            words.extend(''.join(keyword).split())
+        else:
+            words.append(rng.choice(filler))
+    return ' '.join(words)
+
+
+def main():
+    rng = random.Random(SEED)
+    fuzzy = FuzzyMatcher()
+    print(f"{'keywords':>9} {'build (ms)':>11} {'index (ms/article)':>19} {'brute force (ms/article)':>25}")
+    for size in SIZES:
+        lexicon = make_lexicon(rng, size)
+        articles = [make_article(rng, lexicon) for _ in range(ARTICLES)]
+
+        start = time.perf_counter()
+        index = FuzzyIndex(lexicon, matcher=fuzzy)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        by_index = [index.search(text) for text in articles]
+        t_index = (time.perf_counter() - start) / ARTICLES
+
+        brute = '-'
+        if size <= BRUTE_FORCE_MAX:
+            start = time.perf_counter()
+            by_brute = [
+                {kw for kw in lexicon if fuzzy.fuzzy_search(kw, text)[0] > 0}
+                for text in articles
+            ]
+            brute = f"{(time.perf_counter() - start) / ARTICLES * 1000:.1f}"
+            assert by_brute == by_index
+
+        print(f"{size:>9} {build * 1000:>11.1f} {t_index * 1000:>19.1f} {brute:>25}")
+
+
+if __name__ == '__main__':
+    main()
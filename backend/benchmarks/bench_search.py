@@ -0,0 +1,105 @@
+'''
+/api/news/search query latency on a large archive (SQLite file + FTS5).
+
+Fills a temporary database with synthetic articles through the normal
+schema (the triggers index them), then times the first page of a few
+searches in both orders, with and without a ticker / time filter.
+
+    cd backend && python -m benchmarks.bench_search
+    cd backend && python -m benchmarks.bench_search --articles 2000000
+'''
+import argparse
+from datetime import datetime, timedelta
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app import queries
+from app.migrations import create_schema
+from app.models import Article, ArticleCoin
+
+from .generator import make_news
+
+TICKERS = ["BTC", "ETH", "SOL", "XRP", "ADA", "DOGE", "LINK", "AVAX"]
+EXTRA = ["ETF approved", "exchange hacked", "hacked", "SEC lawsuit", "mainnet launch", "whale sells"]
+SEARCHES = ["bitcoin", '"ETF approved"', "hacked", "sol*", "bitcoin crash"]
+CHUNK = 50000
+RUNS = 20
+
+
+def fill(engine, articles, seed=0):
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    done = 0
+    with engine.begin() as conn:
+        while done < articles:
+            size = min(CHUNK, articles - done)
+            news = make_news(size, seed=seed + done)
+            rows, coins = [], []
+            for i, item in enumerate(news):
+                article_id = done + i + 1
+                description = item["description"]
+                if rng.random() < 0.02:
+                    description += " " + rng.choice(EXTRA)
+                row = {
+                    "id": article_id, "title": item["title"], "description": description,
+                    "published_at": start + timedelta(seconds=60 * article_id),
+                    "sentiment_score": rng.choice([-1.0, -0.5, 0.0, 0.5, 1.0]),
+                }
+                rows.append(row)
+                coins.extend(
+                    {"article_id": article_id, "coin_ticker": t,
+                     "published_at": row["published_at"], "sentiment_score": row["sentiment_score"]}
+                    for t in rng.sample(TICKERS, rng.randint(1, 2))
+                )
+            conn.execute(insert(Article.__table__), rows)
+            conn.execute(insert(ArticleCoin.__table__), coins)
+            done += size
+
+
+def time_query(db, statement):
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        rows = db.execute(statement).mappings().all()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000, len(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=1000000)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'search.db')}")
+        create_schema(engine)
+        start = time.perf_counter()
+        fill(engine, args.articles)
+        print(f"{args.articles} articles indexed in {time.perf_counter() - start:.1f}s "
+              f"({os.path.getsize(os.path.join(tmp, 'search.db')) / 2**20:.0f} MiB)")
+
+        since = datetime(2020, 1, 1) + timedelta(seconds=60 * args.articles // 2)
+        filters = [("", {}), ("ticker=SOL", {"tickers": ["SOL"]}), ("since=half", {"since": since})]
+        print(f"{'query':<16} {'filter':<11} {'rank (ms)':>10} {'recent (ms)':>12}")
+        with sessionmaker(bind=engine)() as db:
+            for q in SEARCHES:
+                for label, kwargs in filters:
+                    cells = []
+                    for order in queries.SEARCH_ORDERS:
+                        statement = queries.search_page(
+                            queries.search_select(q, order=order, **kwargs), args.limit + 1, order
+                        )
+                        cells.append(time_query(db, statement)[0])
+                    print(f"{q:<16} {label:<11} {cells[0]:>10.2f} {cells[1]:>12.2f}")
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
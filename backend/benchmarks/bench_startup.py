@@ -0,0 +1,110 @@
+'''
+Matcher startup cost: building the automaton at import (old list-queue BFS
+and the deque one) vs loading the memory-mapped artifact, for the real
+lexicon and larger synthetic ones. Also checks that the loaded matcher
+scans as fast and finds the same labels.
+
+    cd backend && python -m benchmarks.bench_startup
+'''
+from collections import deque
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from app import lexicon
+from app.stringmatching import aho_corasick
+from app.stringmatching.keyword_matcher import KeywordMatcher
+
+SIZES = [2000, 10000]
+SCAN_TEXTS = 200
+REPEAT = 3
+SEED = 11
+
+SYLLABLES = [c + v for c in "bcdfghjklmnprstvwz" for v in "aeiou"]
+
+
+class ListQueue(list):
+    '''The old `queue.pop(0)` BFS queue, O(n) per pop'''
+
+    def popleft(self):
+        return self.pop(0)
+
+
+def real_lexicon():
+    keywords = lexicon.current().keywords
+    return {
+        "coins": lexicon.current().coins,
+        "positive": {kw: [kw] for kw in keywords["positive"]},
+        "negative": {kw: [kw] for kw in keywords["negative"]},
+    }
+
+
+def synthetic_lexicon(rng, size):
+    entries = {}
+    while len(entries) < size:
+        word = ' '.join(
+            ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+            for _ in range(rng.choice([1, 1, 2]))
+        )
+        entries[word] = [word]
+    return {"words": entries}
+
+
+def best(fn):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def import_time(artifact_dir):
+    '''Wall time of a fresh interpreter importing the analyzer'''
+    env = dict(os.environ, MATCHER_ARTIFACT_DIR=artifact_dir)
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import app.sentiment_analysis"], env=env, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    rng = random.Random(SEED)
+    lexicons = [("real", real_lexicon())] + [
+        (str(size), synthetic_lexicon(rng, size)) for size in SIZES
+    ]
+
+    print(f"{'lexicon':>8} {'list BFS (ms)':>14} {'deque BFS (ms)':>15} {'load (ms)':>10} {'scan array/mmap (ms)':>21}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, lexicon in lexicons:
+            path = os.path.join(tmp, f"{name}.acdfa")
+
+            aho_corasick.deque = ListQueue
+            try:
+                t_list, _ = best(lambda: KeywordMatcher(lexicon))
+            finally:
+                aho_corasick.deque = deque
+            t_deque, built = best(lambda: KeywordMatcher(lexicon))
+
+            built.save(path, KeywordMatcher.lexicon_hash(lexicon))
+            t_load, loaded = best(lambda: KeywordMatcher.load(path))
+
+            words = [w for entries in lexicon.values() for aliases in entries.values() for w in aliases]
+            texts = [' '.join(rng.choice(words + ["the", "market", "today"]) for _ in range(40))
+                     for _ in range(SCAN_TEXTS)]
+            t_scan_built, found_built = best(lambda: [built.scan(t) for t in texts])
+            t_scan_loaded, found_loaded = best(lambda: [loaded.scan(t) for t in texts])
+            assert found_built == found_loaded
+
+            print(f"{name:>8} {t_list * 1000:>14.1f} {t_deque * 1000:>15.1f} {t_load * 1000:>10.2f} "
+                  f"{t_scan_built * 1000:>10.1f}/{t_scan_loaded * 1000:<10.1f}")
+
+        cold = import_time(os.path.join(tmp, "cold"))
+        warm = import_time(os.path.join(tmp, "cold"))
+        print(f"\nimport app.sentiment_analysis: {cold * 1000:.0f} ms building, {warm * 1000:.0f} ms from artifacts")
+
+
+if __name__ == '__main__':
+    main()
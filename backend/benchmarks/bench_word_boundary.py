@@ -0,0 +1,59 @@
+'''
+Coin detection precision/recall and throughput: plain substring matching vs
+the whole-word automaton, on a hand-labeled set of headlines.
+
+    cd backend && python -m benchmarks.bench_word_boundary
+'''
+import json
+import os
+import time
+
+from app import lexicon
+from app.coins import identify_coins_in_text
+from app.stringmatching.keyword_matcher import KeywordMatcher
+
+CORPUS = os.path.join(os.path.dirname(__file__), 'data', 'labeled_headlines.json')
+REPEAT = 200
+
+
+def score(detect, corpus):
+    tp = fp = fn = 0
+    for row in corpus:
+        found, expected = set(detect(row['text'])), set(row['coins'])
+        tp += len(found & expected)
+        fp += len(found - expected)
+        fn += len(expected - found)
+    precision = tp / max(1, tp + fp)
+    recall = tp / max(1, tp + fn)
+    return precision, recall, fp
+
+
+def throughput(detect, corpus):
+    texts = [row['text'] for row in corpus] * REPEAT
+    start = time.perf_counter()
+    for text in texts:
+        detect(text)
+    return len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    with open(CORPUS) as f:
+        corpus = json.load(f)
+
+    substring_automaton = KeywordMatcher({"coins": lexicon.current().coins}, whole_words=False)
+    modes = {
+        'substring (in)': lambda text: identify_coins_in_text(text, whole_words=False),
+        'substring automaton': lambda text: substring_automaton.scan(text)['coins'],
+        'whole words': identify_coins_in_text,
+    }
+
+    print(f"{len(corpus)} headlines")
+    print(f"{'mode':<22} {'precision':>9} {'recall':>7} {'false +':>8} {'headlines/s':>12}")
+    for name, detect in modes.items():
+        precision, recall, fp = score(detect, corpus)
+        rate = throughput(detect, corpus)
+        print(f"{name:<22} {precision:>9.3f} {recall:>7.3f} {fp:>8} {rate:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+'''
+Seeded synthetic CryptoPanic-style news for the benchmarks: same seed and
+size -> the same articles, on any machine.
+'''
+from datetime import datetime, timedelta
+import random
+
+from app import lexicon
+
+SIZES = {"small": 1000, "medium": 10000, "large": 100000}
+
+FILLER = (
+    "price market traders said today after week analysts expect investors report "
+    "exchange volume token network launch update data shows amid new"
+).split()
+TEMPLATES = [
+    "{coin} {sentiment} as {filler}",
+    "{filler} {coin} {sentiment} {filler}",
+    "{coin} and {coin2} {sentiment}, {filler}",
+    "Why {coin} could see {sentiment} {filler}",
+    "{filler} {filler}",
+]
+
+
+def size_of(name):
+    '''"small" / "medium" / "large" or a plain number'''
+    return SIZES[name] if name in SIZES else int(name)
+
+
+def typo(rng, word):
+    i = rng.randrange(len(word))
+    return word[:i] + rng.choice("aeiou") + word[i + 1:]
+
+
+def headline(rng, aliases, sentiment_words):
+    sentiment = rng.choice(sentiment_words)
+    if rng.random() < 0.15:
+        sentiment = typo(rng, sentiment)  # exercises the fuzzy pass
+    return rng.choice(TEMPLATES).format(
+        coin=rng.choice(aliases).title(),
+        coin2=rng.choice(aliases),
+        sentiment=sentiment,
+        filler=' '.join(rng.sample(FILLER, rng.randint(2, 6))),
+    )
+
+
+def make_news(size, seed=0):
+    '''
+        `size` news dicts shaped like the CryptoPanic results
+    '''
+    rng = random.Random(seed)
+    lex = lexicon.current()
+    aliases = [alias for names in lex.coins.values() for alias in names]
+    sentiment_words = lex.keywords["positive"] + lex.keywords["negative"]
+
+    start = datetime(2024, 1, 1)
+    news = []
+    for i in range(size):
+        news.append({
+            "id": i + 1,
+            "title": headline(rng, aliases, sentiment_words),
+            "description": headline(rng, aliases, sentiment_words) + f" ({i})",
+            "published_at": (start + timedelta(seconds=37 * i)).isoformat() + "Z",
+        })
+    return news
+
+
+def make_texts(size, seed=0):
+    return [news["title"] + " " + news["description"] for news in make_news(size, seed)]
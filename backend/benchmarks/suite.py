@@ -0,0 +1,282 @@
+'''
+Benchmark suite for the matching + ingest hot paths, with regression check.
+
+Runs every stage over the same seeded synthetic news (benchmarks/generator.py)
+and reports per-article latency (p50/p95/p99), throughput and peak traced
+memory per stage:
+
+    normalize     Document(text): lowercase + tokenize
+    coin_match    coin-only automaton scan (identify_coins_in_text; ingest uses exact_match)
+    exact_match   coins + sentiment automaton scan
+    fuzzy_match   FuzzyIndex.search, cold lookup cache
+    db_write      write_news_rows (insert + rollups + data version + commit), batches of 100, SQLite file
+
+    cd backend && python -m benchmarks.suite --size small --save     # new baseline
+    cd backend && python -m benchmarks.suite --size small --check    # exit 1 on regression
+
+Baselines live in benchmarks/baselines/<size>.json. They are only comparable
+on the machine that wrote them, so re-save after changing hardware.
+'''
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import lexicon
+from app.migrations import create_schema
+from app.sentiment_analysis import analyze_article_batch
+from app.services import news_key, write_news_rows
+from app.stringmatching.document import Document
+
+from .generator import make_news, size_of
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+DB_BATCH = 100
+# latency / throughput / memory may be this much worse than the baseline
+TOLERANCE = 0.25
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class Stage:
+    '''
+        setup() builds the inputs (not timed), run(item) is timed per item;
+        `per_item` articles are handled by one run() call
+    '''
+    per_item = 1
+
+    def __init__(self, news):
+        self.news = news
+
+    def setup(self):
+        return [news["title"] + " " + news["description"] for news in self.news]
+
+    def run(self, item):
+        raise NotImplementedError
+
+    def teardown(self):
+        pass
+
+
+class Normalize(Stage):
+    def run(self, text):
+        return Document(text)
+
+
+class CoinMatch(Stage):
+    def setup(self):
+        self.lex = lexicon.current()
+        return [Document(text) for text in super().setup()]
+
+    def run(self, doc):
+        return self.lex.coin_matcher.scan(doc)
+
+
+class ExactMatch(CoinMatch):
+    def run(self, doc):
+        return self.lex.matcher.scan(doc)
+
+
+class FuzzyMatch(CoinMatch):
+    def setup(self):
+        docs = super().setup()
+        # fresh index every run: the lookup cache would make repeats free
+        self.lex = lexicon.Lexicon.from_file()
+        return docs
+
+    def run(self, doc):
+        return self.lex.fuzzy_index.search(doc)
+
+
+class DbWrite(Stage):
+    per_item = DB_BATCH
+
+    def setup(self):
+        analyses = analyze_article_batch(super().setup())
+        rows = []
+        for news, analysis in zip(self.news, analyses):
+            published_at = news_key(news)[0]
+            for coin in analysis["coins"]:
+                rows.append({
+                    "id": news["id"], "title": news["title"], "description": news["description"],
+                    "coin_ticker": coin, "published_at": published_at,
+                    "sentiment_score": analysis["sentiment"]["score"],
+                })
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp.name, 'bench.db')}")
+        create_schema(self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+
+        by_article = {}
+        for row in rows:
+            by_article.setdefault(row["id"], []).append(row)
+        ids = list(by_article)
+        return [
+            [row for news_id in ids[i:i + DB_BATCH] for row in by_article[news_id]]
+            for i in range(0, len(ids), DB_BATCH)
+        ]
+
+    def run(self, batch):
+        # the production write path, so the data_version bump is timed too
+        write_news_rows(self.db, batch)
+
+    def teardown(self):
+        self.db.close()
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+
+STAGES = {
+    "normalize": Normalize,
+    "coin_match": CoinMatch,
+    "exact_match": ExactMatch,
+    "fuzzy_match": FuzzyMatch,
+    "db_write": DbWrite,
+}
+
+
+def time_stage(stage_cls, news, repeat):
+    '''
+        Best of `repeat` runs (by total time), per-article latencies in us
+    '''
+    best = None
+    for _ in range(repeat):
+        stage = stage_cls(news)
+        items = stage.setup()
+        latencies = []
+        clock = time.perf_counter
+        try:
+            for item in items:
+                start = clock()
+                stage.run(item)
+                latencies.append(clock() - start)
+        finally:
+            stage.teardown()
+        total = sum(latencies)
+        if best is None or total < best[0]:
+            best = (total, latencies, stage.per_item)
+
+    total, latencies, per_item = best
+    per_article = sorted(latency / per_item * 1e6 for latency in latencies)
+    return {
+        "total_s": total,
+        "throughput": len(news) / total if total else float("inf"),
+        "p50_us": percentile(per_article, 0.50),
+        "p95_us": percentile(per_article, 0.95),
+        "p99_us": percentile(per_article, 0.99),
+    }
+
+
+def memory_stage(stage_cls, news):
+    '''
+        Peak traced allocation of one run, in its own pass (tracemalloc
+        slows everything down, so it never overlaps the timing runs)
+    '''
+    stage = stage_cls(news)
+    items = stage.setup()
+    tracemalloc.start()
+    try:
+        kept = [stage.run(item) for item in items]
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        stage.teardown()
+    del kept
+    return peak
+
+
+def run_suite(size, seed=0, repeat=3, stages=None):
+    news = make_news(size, seed)
+    lexicon.current()  # compile / load the matchers outside the timings
+    results = {}
+    for name in stages or STAGES:
+        results[name] = time_stage(STAGES[name], news, repeat)
+        results[name]["peak_kib"] = memory_stage(STAGES[name], news) / 1024
+    return {
+        "size": size,
+        "seed": seed,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "stages": results,
+    }
+
+
+def compare(current, baseline, tolerance=TOLERANCE):
+    '''
+        Regressions of `current` against `baseline`, as readable lines
+    '''
+    problems = []
+    for name, base in baseline["stages"].items():
+        now = current["stages"].get(name)
+        if now is None:
+            continue
+        for metric in ("p50_us", "p95_us", "peak_kib"):
+            if now[metric] > base[metric] * (1 + tolerance):
+                problems.append(f"{name}.{metric}: {now[metric]:.1f} vs baseline {base[metric]:.1f}")
+        if now["throughput"] < base["throughput"] * (1 - tolerance):
+            problems.append(f"{name}.throughput: {now['throughput']:.0f}/s vs baseline {base['throughput']:.0f}/s")
+    return problems
+
+
+def print_report(report):
+    print(f"{report['size']} articles, seed {report['seed']}, Python {report['python']}")
+    print(f"{'stage':<12} {'p50 (us)':>10} {'p95 (us)':>10} {'p99 (us)':>10} {'articles/s':>11} {'peak (KiB)':>11}")
+    for name, stage in report["stages"].items():
+        print(f"{name:<12} {stage['p50_us']:>10.1f} {stage['p95_us']:>10.1f} {stage['p99_us']:>10.1f} "
+              f"{stage['throughput']:>11.0f} {stage['peak_kib']:>11.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", default="small", help="small, medium, large or a number of articles")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--stage", action="append", choices=list(STAGES), help="only these stages")
+    parser.add_argument("--save", action="store_true", help="write the results as the baseline")
+    parser.add_argument("--check", action="store_true", help="exit 1 if a stage regressed")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--baseline-dir", default=BASELINE_DIR)
+    args = parser.parse_args(argv)
+
+    report = run_suite(size_of(args.size), args.seed, args.repeat, args.stage)
+    print_report(report)
+
+    path = os.path.join(args.baseline_dir, f"{args.size}.json")
+    if args.check:
+        if not os.path.exists(path):
+            print(f"\nNo baseline at {path}, run with --save first")
+            return 1
+        with open(path) as f:
+            baseline = json.load(f)
+        if (baseline["size"], baseline["seed"]) != (report["size"], report["seed"]):
+            print(f"\nBaseline {path} is for another size/seed")
+            return 1
+        problems = compare(report, baseline, args.tolerance)
+        if problems:
+            print(f"\nREGRESSION (tolerance {args.tolerance:.0%}):")
+            for line in problems:
+                print("  " + line)
+            return 1
+        print(f"\nNo regression against {path} (tolerance {args.tolerance:.0%})")
+
+    if args.save:
+        os.makedirs(args.baseline_dir, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline saved to {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,317 @@
+import json
+
+import pytest
 from fastapi.testclient import TestClient
-from app.services import app
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.migrations import create_schema
+from app.sentiment_analysis import analyze_sentiment
+from app import queries
+from app.response_cache import bump_version
+from app.services import app, get_db, insert_news_to_db, response_cache
 
 client = TestClient(app)
 
+NEWS = [
+    {"id": 1, "title": "Bitcoin rally continues", "description": "BTC pump", "published_at": "2025-01-01T10:00:00Z"},
+    {"id": 2, "title": "Bitcoin and Solana crash", "description": "fear everywhere", "published_at": "2025-01-02T10:00:00Z"},
+    {"id": 3, "title": "Solana upgrade", "description": "SOL", "published_at": "2025-01-03T10:00:00Z"},
+]
+
+
+def use_test_db(monkeypatch, news=NEWS):
+    '''Point the app at a fresh in-memory DB holding `news`'''
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    create_schema(engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    insert_news_to_db(news, db)
+    db.close()
+
+    def override():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+    app.dependency_overrides[get_db] = override
+    monkeypatch.setattr("app.services.SessionLocal", Session)
+    monkeypatch.setattr("app.services.ReadSessionLocal", Session)
+    monkeypatch.setattr("app.services.ExportSessionLocal", Session)
+    response_cache.expire()  # the cached data version is another test's
+
+
 def test_get_news():
     response = client.get("/api/news")
     assert response.status_code == 200
-    assert isinstance(response.json(), dict)
\ No newline at end of file
+    assert isinstance(response.json(), dict)
+
+
+def test_sentiment_summary(monkeypatch):
+    use_test_db(monkeypatch)
+    try:
+        response = client.get("/api/sentiment/summary")
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 200
+    coins = {row["ticker"]: row for row in response.json()["coins"]}
+    assert set(coins) == {"BTC", "SOL"}
+    assert coins["BTC"]["count"] == 2
+    assert coins["BTC"]["min"] <= coins["BTC"]["mean"] <= coins["BTC"]["max"]
+    assert coins["BTC"]["mean"] == (coins["BTC"]["min"] + coins["BTC"]["max"]) / 2
+    assert coins["SOL"]["latest"].startswith("2025-01-03")
+    assert (coins["BTC"]["bullish"], coins["BTC"]["bearish"]) == (1, 1)
+
+
+def test_news_keyset_pagination(monkeypatch):
+    use_test_db(monkeypatch)
+    try:
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 1, "fields": "id,coin_ticker"}
+            if cursor:
+                params["cursor"] = cursor
+            body = client.get("/api/news", params=params).json()
+            seen += [(row["id"], row["coin_ticker"]) for row in body["news"]]
+            cursor = body["next_cursor"]
+            if not cursor:
+                break
+        filtered = client.get("/api/news", params={"ticker": "sol", "since": "2025-01-02T12:00:00"}).json()
+        bad = client.get("/api/news", params={"fields": "id,_sa_instance_state"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert seen == [(3, "SOL"), (2, "SOL"), (2, "BTC"), (1, "BTC")]
+    assert [row["id"] for row in filtered["news"]] == [3]
+    assert set(filtered["news"][0]) == {"id", "title", "description", "coin_ticker", "published_at", "sentiment_score"}
+    assert bad.status_code == 400
+
+
+def test_articles_one_item_per_article(monkeypatch):
+    use_test_db(monkeypatch)
+    try:
+        first = client.get("/api/articles", params={"limit": 2}).json()
+        rest = client.get("/api/articles", params={"cursor": first["next_cursor"]}).json()
+        btc = client.get("/api/articles", params={"ticker": "btc"}).json()
+    finally:
+        app.dependency_overrides.clear()
+
+    assert [(a["id"], a["coins"]) for a in first["articles"] + rest["articles"]] == [
+        (3, ["SOL"]), (2, ["BTC", "SOL"]), (1, ["BTC"]),
+    ]
+    assert rest["next_cursor"] is None
+    # the filter picks articles, every coin of them is still listed
+    assert [(a["id"], a["coins"]) for a in btc["articles"]] == [(2, ["BTC", "SOL"]), (1, ["BTC"])]
+
+
+def test_news_search(monkeypatch):
+    use_test_db(monkeypatch)
+    try:
+        ranked = client.get("/api/news/search", params={"q": "bitcoin", "limit": 1}).json()
+        second = client.get("/api/news/search", params={"q": "bitcoin", "cursor": ranked["next_cursor"]}).json()
+        recent = client.get("/api/news/search", params={"q": "bitcoin", "order": "recent"}).json()
+        phrase = client.get("/api/news/search", params={"q": '"solana crash"'}).json()
+        filtered = client.get("/api/news/search", params={"q": "sol*", "until": "2025-01-03T00:00:00"}).json()
+        operators = client.get("/api/news/search", params={"q": "NEAR(bitcoin"})
+        empty = client.get("/api/news/search", params={"q": "  ()  "})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert {a["id"] for a in ranked["articles"] + second["articles"]} == {1, 2}
+    assert second["next_cursor"] is None
+    assert [a["id"] for a in recent["articles"]] == [2, 1]
+    assert [(a["id"], a["coins"]) for a in phrase["articles"]] == [(2, ["BTC", "SOL"])]
+    assert [a["id"] for a in filtered["articles"]] == [2]
+    # FTS5 syntax in the input is searched as text, never a 500
+    assert operators.status_code == 200
+    assert empty.status_code == 400
+
+
+def test_news_export_ndjson(monkeypatch):
+    use_test_db(monkeypatch)
+    try:
+        response = client.get("/api/news/export", params={"ticker": "BTC", "fields": "id"})
+    finally:
+        app.dependency_overrides.clear()
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.text.splitlines()] == [{"id": 2}, {"id": 1}]
+
+
+def test_news_export_pool_full(monkeypatch, tmp_path):
+    from app.database import make_read_engine
+
+    url = f"sqlite:///{tmp_path / 'export.db'}"
+    create_schema(create_engine(url))
+    export_engine = make_read_engine(url, pool_size=1, pool_timeout=0.1)
+    monkeypatch.setattr("app.services.ExportSessionLocal", sessionmaker(bind=export_engine))
+    with export_engine.connect():  # a slow download holding the only connection
+        busy = client.get("/api/news/export")
+    assert busy.status_code == 503
+    # and the pool is not left short after the failed attempt
+    assert client.get("/api/news/export").status_code == 200
+
+
+def test_sentiment_timeseries(monkeypatch):
+    news = NEWS + [{"id": 4, "title": "Bitcoin dump", "description": "", "published_at": "2025-01-02T10:30:00Z"}]
+    use_test_db(monkeypatch, news)
+    try:
+        daily = client.get("/api/sentiment/timeseries", params={"resolution": "1d", "ticker": "btc"}).json()
+        hourly = client.get("/api/sentiment/timeseries", params={"since": "2025-01-02T10:59:00"}).json()
+        bad = client.get("/api/sentiment/timeseries", params={"resolution": "2h"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert [(p["bucket"], p["count"]) for p in daily["series"]] == [
+        ("2025-01-01T00:00:00", 1), ("2025-01-02T00:00:00", 2),
+    ]
+    a, b = (analyze_sentiment(n["title"] + " " + n["description"])["score"] for n in news[1::2])
+    assert daily["series"][1]["mean"] == pytest.approx((a + b) / 2)
+    assert daily["series"][1]["stddev"] == pytest.approx(abs(a - b) / 2)
+    # since falls inside the 10:00 bucket, which is returned whole
+    assert [(p["ticker"], p["bucket"], p["count"]) for p in hourly["series"]] == [
+        ("BTC", "2025-01-02T10:00:00", 2), ("SOL", "2025-01-02T10:00:00", 1), ("SOL", "2025-01-03T10:00:00", 1),
+    ]
+    assert bad.status_code == 400
+
+
+def test_response_cache_etag_and_invalidation(monkeypatch):
+    use_test_db(monkeypatch)
+    monkeypatch.setattr("app.response_cache.GZIP_MIN_SIZE", 0)
+    queries_run = []
+    real_select = queries.news_select
+    monkeypatch.setattr(queries, "news_select", lambda *a: queries_run.append(a) or real_select(*a))
+    loads = []
+    real_load = response_cache.load_version
+    monkeypatch.setattr(response_cache, "load_version", lambda: loads.append(1) or real_load())
+    monkeypatch.setattr(response_cache, "ttl", 60)
+    try:
+        first = client.get("/api/news", params={"limit": 2}, headers={"Accept-Encoding": "gzip"})
+        etag = first.headers["etag"]
+        again = client.get("/api/news", params={"limit": 2}, headers={"Accept-Encoding": "identity"})
+        unchanged = client.get("/api/news", params={"limit": 2}, headers={"If-None-Match": etag})
+        other_query = client.get("/api/news", params={"limit": 3})
+        assert len(queries_run) == 2  # the repeat and the 304 never queried
+        assert len(loads) == 1  # nor read the version again
+
+        session = app.dependency_overrides[get_db]()
+        insert_news_to_db([{"id": 9, "title": "Bitcoin pump", "description": "", "published_at": "2025-01-04T10:00:00Z"}],
+                          next(session))
+        changed = client.get("/api/news", params={"limit": 2}, headers={"If-None-Match": etag})
+
+        # an insert by another worker process only shows in data_version,
+        # read again once the TTL is up
+        other_worker = next(app.dependency_overrides[get_db]())
+        bump_version(other_worker)
+        other_worker.commit()
+        within_ttl = client.get("/api/news", params={"limit": 2}, headers={"If-None-Match": changed.headers["etag"]})
+        monkeypatch.setattr(response_cache, "ttl", 0)
+        stale = client.get("/api/news", params={"limit": 2}, headers={"If-None-Match": changed.headers["etag"]})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert first.headers["content-encoding"] == "gzip" and first.json() == again.json()
+    assert "content-encoding" not in again.headers and again.headers["etag"] == etag
+    assert unchanged.status_code == 304 and unchanged.content == b""
+    assert other_query.headers["etag"] != etag
+    assert changed.status_code == 200 and changed.json()["news"][0]["id"] == 9
+    assert within_ttl.status_code == 304
+    assert stale.status_code == 200 and stale.headers["etag"] != changed.headers["etag"]
+    assert len(queries_run) == 4
+
+
+def test_response_cache_ignores_older_versions():
+    from app.response_cache import ResponseCache
+
+    cache = ResponseCache(load_version=None)
+    entry = {"body": b"new", "gzip": None, "media_type": "application/json"}
+    assert cache._get("k", ("t", 2)) is None
+    cache._put("k", ("t", 2), entry)
+    # a slow request that loaded version 1 neither hits nor flushes
+    assert cache._get("k", ("t", 1)) is None
+    cache._put("k", ("t", 1), dict(entry, body=b"old"))
+    assert cache._get("k", ("t", 2)) is entry
+    # a newer version (or another database file) does flush
+    assert cache._get("k", ("t", 3)) is None and cache._get("k", ("u", 0)) is None
+
+
+def test_metrics_endpoint(monkeypatch):
+    use_test_db(monkeypatch)
+    app.dependency_overrides.clear()
+    body = client.get("/metrics")
+    assert body.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = body.text.splitlines()
+    assert "# TYPE chainpulse_stage_seconds histogram" in lines
+    count = next(line for line in lines if line.startswith('chainpulse_stage_seconds_count{stage="insert"}'))
+    assert int(count.split()[-1]) >= 1
+    assert any(line.startswith("chainpulse_db_rows_inserted_total ") for line in lines)
+    assert 'chainpulse_stage_seconds_bucket{stage="insert",le="+Inf"} ' + count.split()[-1] in lines
+
+
+def test_news_socket_pushes_new_articles(monkeypatch):
+    use_test_db(monkeypatch)
+    try:
+        with client.websocket_connect("/api/ws") as ws:
+            session = app.dependency_overrides[get_db]()
+            insert_news_to_db([{"id": 9, "title": "Bitcoin pump", "description": "", "published_at": "2025-01-04T10:00:00Z"}],
+                              next(session))
+            message = ws.receive_json()
+    finally:
+        app.dependency_overrides.clear()
+
+    assert message["event"] == "news"
+    assert [(a["id"], a["coins"], a["published_at"]) for a in message["data"]["articles"]] == [
+        (9, ["BTC"], "2025-01-04T10:00:00"),
+    ]
+    # only the touched coin, with its totals after the insert
+    assert [(c["ticker"], c["count"], c["latest"]) for c in message["data"]["coins"]] == [
+        ("BTC", 3, "2025-01-04T10:00:00"),
+    ]
+
+
+def test_broadcaster_bounds_slow_clients():
+    import asyncio
+    from app.broadcast import RESET, Broadcaster
+
+    async def run():
+        hub = Broadcaster(buffer=2, history=3)
+        with hub.subscribe() as slow, hub.subscribe() as fast:
+            for i in range(4):
+                hub.publish("news", str(i))
+                assert (await fast.get(1)).data == str(i)
+            # the slow one overflowed on the 3rd event: told to resync, then the 4th
+            assert [await slow.get(1), (await slow.get(1)).seq, await slow.get(0.01)] == [RESET, 4, None]
+
+        boot = hub.publish("news", "4").id.split("-")[0]
+        with hub.subscribe(last_event_id=f"{boot}-3") as resumed, hub.subscribe(last_event_id=f"{boot}-1") as too_old:
+            assert [(await resumed.get(1)).seq, (await resumed.get(1)).seq] == [4, 5]
+            assert await too_old.get(1) is RESET
+        with hub.subscribe(last_event_id=f"{boot}-5") as current:
+            assert await current.get(0.01) is None
+
+        # after a restart the old ids mean nothing: resync
+        restarted = Broadcaster(buffer=2, history=3)
+        restarted.publish("news", "0")
+        for last_event_id in (f"{boot}-1", f"{boot}-5", "57"):
+            with restarted.subscribe(last_event_id=last_event_id) as resumed:
+                assert await resumed.get(1) is RESET
+
+    asyncio.run(run())
+
+
+def test_settings_from_dotenv(tmp_path):
+    import os
+    import subprocess
+    import sys
+
+    (tmp_path / ".env").write_text("STORAGE_MODE=rollback\nSQL_ECHO=1\nMETRICS_ENABLED=false\n")
+    env = {k: v for k, v in os.environ.items() if k not in ("STORAGE_MODE", "SQL_ECHO", "METRICS_ENABLED")}
+    env["PYTHONPATH"] = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # `python -c` has no script file, so python-dotenv looks for .env from the cwd
+    out = subprocess.run(
+        [sys.executable, "-c", "from app import database, metrics; "
+         "print(database.STORAGE_MODE, database.SQL_ECHO, metrics.ENABLED)"],
+        cwd=tmp_path, env=env, capture_output=True, text=True, check=True,
+    )
+    assert out.stdout.split() == ["rollback", "True", "False"]
@@ -0,0 +1,19 @@
+from benchmarks.generator import make_news
+from benchmarks.suite import compare, run_suite
+
+
+def test_generator_is_seeded():
+    assert make_news(5, seed=1) == make_news(5, seed=1)
+    assert make_news(5, seed=1) != make_news(5, seed=2)
+
+
+def test_suite_flags_regressions():
+    report = run_suite(20, repeat=1)
+    assert set(report["stages"]) == {"normalize", "coin_match", "exact_match", "fuzzy_match", "db_write"}
+    assert compare(report, report) == []
+
+    slower = {"stages": {"fuzzy_match": dict(report["stages"]["fuzzy_match"])}}
+    slower["stages"]["fuzzy_match"]["p50_us"] *= 2
+    slower["stages"]["fuzzy_match"]["throughput"] /= 2
+    assert compare(report, report, tolerance=0.25) == []
+    assert [line.split(":")[0] for line in compare(slower, report)] == ["fuzzy_match.p50_us", "fuzzy_match.throughput"]
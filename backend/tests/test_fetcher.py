@@ -0,0 +1,104 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from app.fetcher import CryptoPanicFetcher
+
+PAGES = {
+    1: {"next": "?page=2", "results": [{"id": 1}, {"id": 2}]},
+    2: {"next": "?page=3", "results": [{"id": 2}, {"id": 3}]},
+    3: {"next": None, "results": [{"id": 4}]},
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    '''Paged CryptoPanic stand-in: page 2 is rate limited once, pages carry ETags'''
+    calls = []
+    broken = set()  # pages answered with 403
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        page = int(query.get("page", ["1"])[0])
+        self.calls.append((page, self.headers.get("If-None-Match")))
+
+        if page in self.broken:
+            self.send_response(403)
+            self.end_headers()
+            return
+
+        if page == 2 and sum(1 for p, _ in self.calls if p == 2) == 1:
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+        if page not in PAGES:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        etag = f'"page-{page}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        body = json.dumps(PAGES[page]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_fetcher_against_stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/posts/"
+
+    async def run():
+        fetcher = CryptoPanicFetcher(url, {"auth_token": "x"}, max_pages=4, backoff=0)
+        try:
+            first = await fetcher.fetch()
+            second = await fetcher.fetch()
+        finally:
+            await fetcher.aclose()
+        return first, second
+
+    try:
+        first, second = asyncio.run(run())
+    finally:
+        server.shutdown()
+
+    assert [item["id"] for item in first] == [1, 2, 3, 4]
+    assert second == first
+    # retried the 429, and the second round went out with validators (304s)
+    assert sum(1 for page, _ in StubHandler.calls if page == 2) == 3
+    assert (1, '"page-1"') in StubHandler.calls
+
+
+def test_fetcher_keeps_pages_that_loaded(monkeypatch):
+    monkeypatch.setattr(StubHandler, "broken", {2})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/posts/"
+
+    async def run():
+        fetcher = CryptoPanicFetcher(url, {"auth_token": "x"}, max_pages=3, backoff=0)
+        try:
+            return await fetcher.fetch()
+        finally:
+            await fetcher.aclose()
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        server.shutdown()
+
+    # page 2 is lost, pages 1 and 3 are not
+    assert [item["id"] for item in results] == [1, 2, 4]
@@ -0,0 +1,247 @@
+import asyncio
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import pipeline
+from app.migrations import create_schema
+from app.models import IngestState, News
+from app.scheduler import IngestScheduler
+from app.sentiment_analysis import analyze_article_batch
+from app.services import bulk_insert_news, existing_news_ids, ingest_new_news, insert_news_to_db, plan_insert
+
+NEWS = [
+    {"id": 1, "title": "Bitcoin rally continues", "description": "BTC and ETH pump", "published_at": "2025-01-01T10:00:00Z"},
+    {"id": 2, "title": "Solana outage", "description": "SOL hit by crash", "published_at": "2025-01-01T11:00:00Z"},
+    {"id": 3, "title": "Markets are quiet", "description": "Nothing to see", "published_at": "2025-01-01T12:00:00Z"},
+]
+
+
+def make_session():
+    engine = create_engine("sqlite://")
+    create_schema(engine)
+    return sessionmaker(bind=engine)()
+
+
+def test_analyze_articles_pool_matches_serial(monkeypatch):
+    texts = [n["title"] + " " + n["description"] for n in NEWS] * 5
+    monkeypatch.setattr(pipeline, "WORKERS", 2)
+    monkeypatch.setattr(pipeline, "POOL_MIN_BATCH", 1)
+    monkeypatch.setattr(pipeline, "CHUNK_SIZE", 4)
+    try:
+        assert pipeline.analyze_articles(texts) == analyze_article_batch(texts)
+
+        # the workers match with the parent's lexicon, not whatever the file holds
+        from app import lexicon
+        data = dict(lexicon.current().data)
+        data["sentiment"] = dict(data["sentiment"], positive=data["sentiment"]["positive"] + ["quiet"])
+        edited = lexicon.Lexicon(data, "edited")
+        assert pipeline.analyze_articles(texts, edited) == analyze_article_batch(texts, edited)
+        assert pipeline.analyze_articles(texts, edited) != analyze_article_batch(texts)
+    finally:
+        pipeline.shutdown_pool()
+
+
+def test_insert_news_to_db_batch():
+    db = make_session()
+    insert_news_to_db(NEWS + NEWS[:1], db)
+    rows = sorted((row.id, row.coin_ticker) for row in db.query(News).all())
+    assert rows == [(1, "BTC"), (1, "ETH"), (2, "SOL")]
+
+    # already stored -> nothing new
+    insert_news_to_db(NEWS, db)
+    assert db.query(News).count() == 3
+
+
+def test_bulk_insert_skips_conflicts(monkeypatch):
+    db = make_session()
+    row = {"id": 7, "title": "t", "description": "d", "coin_ticker": "BTC",
+           "published_at": None, "sentiment_score": 0.5}
+    bulk_insert_news(db, [row, dict(row, coin_ticker="ETH")])
+    bulk_insert_news(db, [dict(row, sentiment_score=-1.0)])
+    db.commit()
+    assert db.query(News).count() == 2
+    assert db.query(News).filter(News.coin_ticker == "BTC").one().sentiment_score == 0.5
+
+    monkeypatch.setattr("app.services.IN_CHUNK_SIZE", 1)
+    assert existing_news_ids(db, [7, 8, None]) == {7}
+
+
+def test_ingest_only_past_watermark(monkeypatch):
+    db = make_session()
+    assert ingest_new_news(NEWS[:2], db)["skipped"] == 0
+    state = db.get(IngestState, "cryptopanic")
+    assert (state.published_at.hour, state.last_id) == (11, 2)
+
+    analyzed = []
+    real = plan_insert
+    monkeypatch.setattr("app.services.plan_insert",
+                        lambda news, db: analyzed.extend(n["id"] for n in news) or real(news, db))
+    result = ingest_new_news(NEWS, db)
+    assert analyzed == [3]
+    assert result["skipped"] == 2
+    assert db.get(IngestState, "cryptopanic").last_id == 3
+
+
+def test_scheduler_coalesces_refreshes():
+    calls = []
+
+    async def job():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"run": len(calls)}
+
+    async def run():
+        scheduler = IngestScheduler(job, interval=0)
+        first = await asyncio.gather(*(scheduler.refresh() for _ in range(5)))
+        second = await scheduler.refresh()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == [{"run": 1}] * 5
+    assert second == {"run": 2}
+
+
+def test_scheduler_stop_waits_for_the_run():
+    finished = []
+
+    async def job():
+        await asyncio.sleep(0.05)
+        finished.append(1)
+
+    async def run():
+        scheduler = IngestScheduler(job, interval=0)
+        scheduler.start()
+        await asyncio.sleep(0.01)  # first run in progress
+        await scheduler.stop()
+        return list(finished)
+
+    assert asyncio.run(run()) == [1]
+
+
+def test_analysis_cache_by_content_hash(monkeypatch):
+    from app import analysis_cache as ac
+
+    db = make_session()
+    texts = [n["title"] + " " + n["description"] for n in NEWS]
+    cache = ac.AnalysisCache(size=2)
+    expected = analyze_article_batch(texts)
+    assert cache.analyze(texts + texts[:1], db) == expected + expected[:1]
+
+    # second pass: LRU (2 entries) + table, no matching at all
+    monkeypatch.setattr(ac, "analyze_articles", lambda texts, lex: 1 / 0)
+    monkeypatch.setattr(ac, "identify_coins_in_text", lambda text, lex: 1 / 0)
+    assert ac.AnalysisCache().analyze(texts, db) == expected
+
+    # sentiment lexicon bumped -> only sentiment is recomputed
+    lex = ac.lexicon.current()
+    monkeypatch.setattr(lex, "versions", dict(lex.versions, sentiment="v2"))
+    recomputed = []
+    monkeypatch.setattr(ac.sentiment_analysis, "analyze_sentiment",
+                        lambda text, lex: recomputed.append(text) or {"score": 0})
+    results = ac.AnalysisCache().analyze(texts, db)
+    assert sorted(recomputed) == sorted(texts)
+    assert [r["coins"] for r in results] == [r["coins"] for r in expected]
+    assert db.query(ac.AnalysisResult).filter_by(component="sentiment", version="v2").count() == 3
+
+
+def test_rollups_follow_inserts():
+    from app.models import SentimentRollup
+    from app.rollups import rebuild_rollups
+
+    db = make_session()
+    insert_news_to_db(NEWS[:1], db)
+    insert_news_to_db(NEWS, db)
+    # conflicting rows must not be counted twice
+    bulk_insert_news(db, [{"id": 1, "title": "", "description": "", "coin_ticker": "BTC",
+                           "published_at": None, "sentiment_score": 1.0}])
+
+    def snapshot():
+        return sorted((r.resolution, r.coin_ticker, r.bucket, r.count, r.score_sum, r.score_sumsq)
+                      for r in db.query(SentimentRollup))
+
+    incremental = snapshot()
+    assert len(incremental) == 3 * 3  # BTC, ETH, SOL x 5m/1h/1d
+    rebuild_rollups(db)
+    assert snapshot() == incremental
+
+
+def test_migrate_old_news_table():
+    from sqlalchemy import text
+    from app.models import Article, ArticleCoin
+
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE news (id INTEGER NOT NULL, title VARCHAR, description VARCHAR, "
+            "coin_ticker VARCHAR NOT NULL, published_at DATETIME, sentiment_score FLOAT, "
+            "PRIMARY KEY (id, coin_ticker))"
+        ))
+        conn.execute(text(
+            "INSERT INTO news VALUES (1, 't', 'd', 'BTC', '2025-01-01 10:00:00.000000', 0.5), "
+            "(1, 't', 'd', 'ETH', '2025-01-01 10:00:00.000000', 0.5), (2, 'u', 'e', 'SOL', NULL, -1.0)"
+        ))
+    create_schema(engine)
+    create_schema(engine)  # second start: nothing left to migrate
+
+    db = sessionmaker(bind=engine)()
+    assert db.query(Article).count() == 2
+    assert db.query(ArticleCoin).count() == 3
+    rows = sorted((row.id, row.coin_ticker, row.sentiment_score) for row in db.query(News))
+    assert rows == [(1, "BTC", 0.5), (1, "ETH", 0.5), (2, "SOL", -1.0)]
+    # migrated articles are in the full-text index too
+    assert db.execute(text("SELECT rowid FROM articles_fts WHERE articles_fts MATCH 'e'")).scalars().all() == [2]
+
+
+def test_ticker_pages_follow_the_index():
+    from sqlalchemy import text
+    from app import queries
+
+    db = make_session()
+    insert_news_to_db(NEWS, db)
+    statement = queries.news_select(list(queries.NEWS_FIELDS), tickers=["BTC"]).limit(20)
+    sql = str(statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True}))
+    plan = " ".join(row[-1] for row in db.execute(text("EXPLAIN QUERY PLAN " + sql)))
+    assert "ix_article_coins_coin_ticker_published_at" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_writer_batches_and_isolates_jobs(tmp_path):
+    import pytest
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+    from app.database import make_engines
+    from app.models import Article
+    from app.writer import DbWriter
+
+    write_engine, read_engine = make_engines(f"sqlite:///{tmp_path / 'wal.db'}", "wal")
+    create_schema(write_engine)
+
+    def add(db, article_id):
+        db.add(Article(id=article_id, title="t"))
+        db.commit()
+        return article_id
+
+    def fail(db):
+        db.add(Article(id=99, title="t"))
+        db.flush()
+        raise ValueError("boom")
+
+    writer = DbWriter(write_engine, linger=0.5)
+    writer.start()
+    try:
+        futures = [writer.submit(add, 1), writer.submit(fail), writer.submit(add, 2)]
+        assert futures[0].result() == 1 and futures[2].result() == 2
+        with pytest.raises(ValueError):
+            futures[1].result()
+    finally:
+        writer.stop()
+
+    assert writer.batches == 1  # three jobs, one commit
+    with pytest.raises(RuntimeError):
+        writer.submit(add, 3)  # stopped: nobody would ever commit it
+    with read_engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("SELECT id FROM articles ORDER BY id")).scalars().all() == [1, 2]
+        with pytest.raises(OperationalError):
+            conn.execute(text("DELETE FROM articles"))
@@ -0,0 +1,188 @@
+from app.stringmatching.document import Document
+from app.stringmatching.aho_corasick import AhoCorasick
+from app.stringmatching.keyword_matcher import KeywordMatcher
+from app.stringmatching.fuzzy import FuzzyMatcher
+from app.stringmatching.fuzzy_index import FuzzyIndex
+from app.coins import identify_coins_in_text
+from app.sentiment_analysis import analyze_article, analyze_sentiment
+
+
+def test_keyword_matcher_single_scan():
+    matcher = KeywordMatcher({
+        "coins": {"BTC": ["bitcoin", "btc"], "ETH": ["ethereum", "eth"]},
+        "positive": {"pump": ["pump"]},
+    })
+    found = matcher.scan("Bitcoin pump, ETH flat!")
+    assert found == {"coins": {"BTC", "ETH"}, "positive": {"pump"}}
+
+
+def test_analyze_article_matches_analyze_sentiment():
+    text = "Ethereum and Ripple are soaring, but Solana faces a crash"
+    result = analyze_article(text)
+    assert result["coins"] == ["ETH", "SOL", "XRP"]
+    assert result["sentiment"] == analyze_sentiment(text)
+
+
+def test_compiled_automaton_alphabet():
+    dfa = AhoCorasick(["ada", "near protocol", "web3"]).compile()
+    # space, digits and unknown characters keep their own identity
+    assert dict(dfa.search_words("bad news")) == {}
+    assert dict(dfa.search_words("nearaprotocol web3")) == {"web3": [14]}
+    assert dict(dfa.search_words("near protocol über ada")) == {
+        "near protocol": [0], "ada": [19],
+    }
+
+
+def test_whole_word_mode():
+    text = "Whether the top solution lasts, SOL/ETH pair (eth) rallies"
+    assert identify_coins_in_text(text) == ["ETH", "SOL"]
+    assert "OP" in identify_coins_in_text(text, whole_words=False)
+
+    dfa = AhoCorasick(["down", "near protocol"], whole_words=True).compile()
+    assert dict(dfa.search_words("countdown; near-protocol down")) == {
+        "near protocol": [11], "down": [25],
+    }
+
+
+def test_bounded_levenshtein():
+    fm = FuzzyMatcher()
+    assert fm.levenshtein_distance("rally", "rallly") == 1
+    assert fm.levenshtein_distance("kitten", "sitting", max_distance=3) == 3
+    # over the bound -> bound + 1, no matter how far off
+    assert fm.levenshtein_distance("kitten", "sitting", max_distance=2) == 3
+    assert fm.levenshtein_distance("moon", "parabolic", max_distance=2) == 3
+
+    assert fm.similarity_at_least("crash", "crssh", 0.7) == fm.calculate_similarity("crash", "crssh")
+    assert fm.similarity_at_least("pump", "dump", 0.8) is None
+
+
+def test_fuzzy_index_agrees_with_fuzzy_search():
+    fm = FuzzyMatcher()
+    lexicon = ["rally", "crash", "bear market", "rugpull", "moon"]
+    index = FuzzyIndex(lexicon, matcher=fm)
+    text = "a rallly then bearmarket, rug pul and the moonn"
+    expected = {kw for kw in lexicon if fm.fuzzy_search(kw, text)[0] > 0}
+    assert index.search(text) == expected == {"rally", "bear market", "moon"}
+
+
+def test_fuzzy_index_shared_between_threads():
+    from concurrent.futures import ThreadPoolExecutor
+    from app.stringmatching.fuzzy_index import _Bucket
+
+    assert _Bucket().arrays()[0].size == 0  # empty bucket, nothing added yet
+
+    index = FuzzyIndex(["rally", "crash", "bear market", "moon"])
+    index.CACHE_SIZE = 8  # evicts all the time
+    texts = [f"a rallly {i} then bearmarket and the moonn crassh" for i in range(200)]
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(index.search, texts))
+    assert all(found == {"rally", "bear market", "moon", "crash"} for found in results)
+
+
+def test_document_tokenizes_once():
+    doc = Document("BTC's rally -- ETH, SOL!")
+    assert doc.tokens == ["btcs", "rally", "eth", "sol"]
+    assert doc.offsets == [0, 6, 15, 20]
+    assert doc.ngrams(2) == FuzzyMatcher.get_ngrams(doc.lower, 2)
+    assert doc.ngrams(2) is doc.ngrams(2)
+
+
+def test_matcher_artifact_roundtrip(tmp_path):
+    path = str(tmp_path / "m.acdfa")
+    lexicon = {"coins": {"BTC": ["bitcoin"], "NEAR": ["near protocol"]}, "negative": {"dump": ["dump"]}}
+    built = KeywordMatcher.cached(lexicon, path)
+    loaded = KeywordMatcher.cached(lexicon, path)
+    assert isinstance(loaded.automaton.delta, memoryview)
+    text = "Near-Protocol and bitcoin dump"
+    assert loaded.scan(text) == built.scan(text) == {"coins": {"BTC", "NEAR"}, "negative": {"dump"}}
+
+    # lexicon changed -> artifact rebuilt
+    lexicon["coins"]["ETH"] = ["ethereum"]
+    rebuilt = KeywordMatcher.cached(lexicon, path)
+    assert rebuilt.scan("ethereum")["coins"] == {"ETH"}
+    assert KeywordMatcher.load(path).lexicon_hash == KeywordMatcher.lexicon_hash(lexicon)
+
+
+def test_truncated_artifact_closes_the_map(tmp_path, monkeypatch):
+    import mmap
+    import os
+    import pytest
+    from app.stringmatching.aho_corasick import CompiledAhoCorasick
+
+    path = str(tmp_path / "m.acdfa")
+    KeywordMatcher.cached({"coins": {"BTC": ["bitcoin"]}}, path)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 4)
+
+    maps = []
+
+    class TrackedMap(mmap.mmap):
+        def __init__(self, *args, **kwargs):
+            maps.append(self)
+
+    monkeypatch.setattr(mmap, "mmap", TrackedMap)
+    with pytest.raises(ValueError, match="truncated"):
+        CompiledAhoCorasick.load(path)
+    assert len(maps) == 1 and maps[0].closed
+
+
+def test_lexicon_hot_reload(tmp_path, monkeypatch):
+    import asyncio
+    import json
+    import pytest
+    from app import lexicon
+
+    monkeypatch.setattr("app.artifacts.ARTIFACT_DIR", str(tmp_path))
+    path = tmp_path / "lexicon.json"
+    data = {"coins": {"BTC": ["bitcoin"]}, "sentiment": {"positive": ["pump"], "negative": ["dump"]}}
+    path.write_text(json.dumps(data))
+
+    original = lexicon.current()
+    try:
+        lexicon.swap(lexicon.Lexicon.from_file(str(path)))
+        old = lexicon.current()
+        text = "Bitcoin and newcoin pump"
+        assert analyze_article(text)["coins"] == ["BTC"]
+
+        data["coins"]["NEW"] = ["newcoin"]
+        path.write_text(json.dumps(data))
+        assert asyncio.run(lexicon.reload_in_background(str(path))) is True
+        assert asyncio.run(lexicon.reload_in_background(str(path))) is False
+        pool = lexicon.get_compile_pool()
+        lexicon.swap(old)
+        assert asyncio.run(lexicon.reload_in_background(str(path))) is True
+        assert lexicon.get_compile_pool() is pool
+        assert analyze_article(text)["coins"] == ["BTC", "NEW"]
+        # whoever still holds the old version keeps a working matcher
+        assert analyze_article(text, old)["coins"] == ["BTC"]
+        assert lexicon.current().versions["sentiment"] == old.versions["sentiment"]
+
+        path.write_text('{"coins": ')
+        with pytest.raises(ValueError):
+            lexicon.reload(str(path))
+        assert analyze_article(text)["coins"] == ["BTC", "NEW"]
+    finally:
+        lexicon.shutdown_compile_pool()
+        lexicon.swap(original)
+
+
+def test_batch_scoring_matches_analyze_sentiment():
+    from app.batch_scoring import BatchScorer, score_corpus
+
+    texts = [
+        "Bitcoin rally continues as ETF approved",
+        "Looks like a rallly and crssh are coming",
+        "This is a moonn pumpy surgey rugpul market",
+        "Analysts predict a bear market and potential dump",
+        "", "!!!", "Nothing exciting here",
+        "Whale dumped, flash crash; all time high next?",
+    ]
+    scores = score_corpus(texts)
+    assert scores.results() == [analyze_sentiment(text) for text in texts]
+    assert BatchScorer().score(texts, chunk_size=3).results() == scores.results()
+    assert scores.hits.to_dense().sum(axis=1).tolist() == (scores.pos_count + scores.neg_count).tolist()
+
+    index = FuzzyIndex(["rally", "bear market", "all time high", "up"])
+    phrases = ["rallly", "a", "bearmarket", "ralley", "u", "all time hgh"]
+    for n in (1, 3):
+        assert index.lookup_many(n, phrases) == [index.lookup(n, p) for p in phrases]
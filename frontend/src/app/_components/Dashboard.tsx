@@ -2,10 +2,28 @@
 
 import React, { useEffect, useRef, useState } from "react";
 import * as d3 from "d3";
-import { SentimentItem, CoinSentiment, BubbleNode } from "../types/types";
+import {
+	SentimentItem,
+	CoinSentiment,
+	CoinSummary,
+	BubbleNode,
+	NewsEvent,
+} from "../types/types";
 
 const API_URL = process.env.NEXT_PUBLIC_BACKEND_URL || "http://localhost:8081";
 
+// The feed shows the newest page only; totals come from /api/sentiment/summary
+const PAGE_SIZE = 100;
+
+const toCoinSentiment = (coin: CoinSummary): CoinSentiment => ({
+	ticker: coin.ticker,
+	name: coin.ticker,
+	news_count: coin.count,
+	sentiment_score: coin.mean ?? 0,
+	bullish_count: coin.bullish,
+	bearish_count: coin.bearish,
+});
+
 const Dashboard = () => {
 	const svgRef = useRef<SVGSVGElement | null>(null);
 	const [sentimentData, setSentimentData] = useState<SentimentItem[] | null>(
@@ -15,15 +33,21 @@ const Dashboard = () => {
 	const [error, setError] = useState<string | null>(null);
 	const [isRefreshing, setIsRefreshing] = useState(false);
 	const [processedData, setProcessedData] = useState<CoinSentiment[]>([]);
+	const streamRef = useRef<EventSource | null>(null);
+
+	const fetchNews = async () => {
+		const res = await fetch(`${API_URL}/api/news?limit=${PAGE_SIZE}`);
+		const data = await res.json();
+		setSentimentData(data.news);
+	};
 
 	// Fetch news/sentiment data
 	useEffect(() => {
 		const fetchSentimentData = async () => {
 			try {
 				setIsLoading(true);
-				const res = await fetch(`${API_URL}/api/news`);
-				const data = await res.json();
-				setSentimentData(data.news.reverse());
+				await fetchNews();
+				await fetchSummary();
 			} catch (err: unknown) {
 				if (err instanceof Error) {
 					setError(err.message);
@@ -35,6 +59,57 @@ const Dashboard = () => {
 		fetchSentimentData();
 	}, []);
 
+	// New articles are pushed by the backend (/api/stream), no refetching
+	useEffect(() => {
+		const stream = new EventSource(`${API_URL}/api/stream`);
+		streamRef.current = stream;
+
+		stream.addEventListener("news", (event) => {
+			const data: NewsEvent = JSON.parse((event as MessageEvent).data);
+			const rows: SentimentItem[] = data.articles.flatMap((article) =>
+				article.coins.map((coin) => ({
+					id: article.id,
+					title: article.title,
+					description: article.description,
+					coin_ticker: coin,
+					published_at: article.published_at,
+					sentiment_score: article.sentiment_score,
+				}))
+			);
+			// Skip rows already shown (after a reset + refetch), keep one page
+			setSentimentData((current) => {
+				const seen = new Set(
+					(current ?? []).map((row) => `${row.id}:${row.coin_ticker}`)
+				);
+				const fresh = rows.filter(
+					(row) => !seen.has(`${row.id}:${row.coin_ticker}`)
+				);
+				return [...fresh, ...(current ?? [])].slice(0, PAGE_SIZE);
+			});
+			// The event carries the totals of the touched coins, replace them
+			setProcessedData((current) => {
+				const updated = new Map(
+					current.map((coin) => [coin.ticker, coin])
+				);
+				data.coins.forEach((coin) =>
+					updated.set(coin.ticker, toCoinSentiment(coin))
+				);
+				return Array.from(updated.values());
+			});
+		});
+
+		// Missed events (slow connection): reload once, then keep listening
+		stream.addEventListener("reset", () => {
+			fetchNews().catch(console.error);
+			fetchSummary().catch(console.error);
+		});
+
+		return () => {
+			stream.close();
+			streamRef.current = null;
+		};
+	}, []);
+
 	// Refresh news
 	async function handleRefresh() {
 		try {
@@ -42,9 +117,11 @@ const Dashboard = () => {
 			await fetch(`${API_URL}/api/refresh-news`, {
 				method: "POST",
 			});
-			const res = await fetch(`${API_URL}/api/news`);
-			const data = await res.json();
-			setSentimentData(data.news.reverse());
+			// The stream already delivered the new articles; pull only without it
+			if (streamRef.current?.readyState !== EventSource.OPEN) {
+				await fetchNews();
+				await fetchSummary();
+			}
 		} catch (err) {
 			console.error("Refresh failed:", err);
 		} finally {
@@ -52,46 +129,13 @@ const Dashboard = () => {
 		}
 	}
 
-	// Process news data
-	const processSentimentData = (
-		newsData: SentimentItem[]
-	): CoinSentiment[] => {
-		const coinSentiments: Record<
-			string,
-			Omit<CoinSentiment, "sentiment_score">
-		> = {};
-
-		newsData.forEach((news) => {
-			const ticker = news.coin_ticker;
-			if (!coinSentiments[ticker]) {
-				coinSentiments[ticker] = {
-					ticker,
-					name: ticker,
-					scores: [],
-					news_count: 0,
-				};
-			}
-			coinSentiments[ticker].scores.push(news.sentiment_score);
-			coinSentiments[ticker].news_count++;
-		});
-
-		return Object.values(coinSentiments).map((coin) => ({
-			...coin,
-			sentiment_score:
-				coin.scores.length > 0
-					? coin.scores.reduce((a, b) => a + b, 0) /
-					  coin.scores.length
-					: 0,
-		}));
+	// Per-coin aggregates, computed server-side
+	const fetchSummary = async () => {
+		const res = await fetch(`${API_URL}/api/sentiment/summary`);
+		const data: { coins: CoinSummary[] } = await res.json();
+		setProcessedData(data.coins.map(toCoinSentiment));
 	};
 
-	useEffect(() => {
-		if (sentimentData) {
-			const processed = processSentimentData(sentimentData);
-			setProcessedData(processed);
-		}
-	}, [sentimentData]);
-
 	// Prediction Function
 	function predictPriceChange(sentimentScore: number): string {
 		const percent = (sentimentScore * 10).toFixed(2);
@@ -295,6 +339,16 @@ const Dashboard = () => {
 
 	const currentNews = sentimentData ?? [];
 
+	// Over every stored article, not just the page in the feed
+	const totals = processedData.reduce(
+		(sum, coin) => ({
+			bullish: sum.bullish + coin.bullish_count,
+			bearish: sum.bearish + coin.bearish_count,
+			total: sum.total + coin.news_count,
+		}),
+		{ bullish: 0, bearish: 0, total: 0 }
+	);
+
 	const getSentimentLabel = (score: number) => {
 		if (score > 0.1)
 			return { label: "Bullish", emoji: "🚀", color: "text-green-400" };
@@ -389,15 +443,11 @@ const Dashboard = () => {
 					</div>
 
 					{/* Stats */}
-					{sentimentData && sentimentData.length > 0 && (
+					{processedData.length > 0 && (
 						<div className="mt-6 grid grid-cols-3 gap-4 w-full px-20">
 							<div className="bg-gray-800 p-4 rounded-lg text-center">
 								<div className="text-xl font-bold text-green-400">
-									{
-										sentimentData.filter(
-											(d) => d.sentiment_score > 0.1
-										).length
-									}
+									{totals.bullish}
 								</div>
 								<div className="text-xs text-gray-400">
 									Bullish Articles
@@ -405,11 +455,7 @@ const Dashboard = () => {
 							</div>
 							<div className="bg-gray-800 p-4 rounded-lg text-center">
 								<div className="text-xl font-bold text-red-400">
-									{
-										sentimentData.filter(
-											(d) => d.sentiment_score < -0.1
-										).length
-									}
+									{totals.bearish}
 								</div>
 								<div className="text-xs text-gray-400">
 									Bearish Articles
@@ -417,7 +463,7 @@ const Dashboard = () => {
 							</div>
 							<div className="bg-gray-800 p-4 rounded-lg text-center">
 								<div className="text-xl font-bold text-blue-400">
-									{sentimentData.length}
+									{totals.total}
 								</div>
 								<div className="text-xs text-gray-400">
 									Total Articles
@@ -432,7 +478,8 @@ const Dashboard = () => {
 					<div className="mb-4">
 						<h2 className="text-2xl font-bold mb-2">Latest News</h2>
 						<p className="text-gray-400 text-sm">
-							{sentimentData?.length || 0} total articles
+							Latest {currentNews.length} of {totals.total}{" "}
+							articles
 						</p>
 					</div>
 
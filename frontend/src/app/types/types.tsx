@@ -12,9 +12,37 @@ export type SentimentItem = {
 export type CoinSentiment = {
 	ticker: string;
 	name: string;
-	scores: number[];
 	news_count: number;
 	sentiment_score: number;
+	bullish_count: number;
+	bearish_count: number;
+};
+
+export type CoinSummary = {
+	ticker: string;
+	count: number;
+	mean: number | null;
+	min: number | null;
+	max: number | null;
+	latest: string | null;
+	bullish: number;
+	bearish: number;
+};
+
+export type ArticleItem = {
+	id: number;
+	title: string;
+	description?: string;
+	coins: string[];
+	published_at: string;
+	sentiment_score: number;
+};
+
+// One /api/stream "news" event: the new articles, and the current summary
+// of the coins they mention
+export type NewsEvent = {
+	articles: ArticleItem[];
+	coins: CoinSummary[];
 };
 
 export type BubbleNode = CoinSentiment &